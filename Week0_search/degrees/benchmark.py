@@ -0,0 +1,238 @@
+"""
+Benchmark for the degrees search engines on synthetic data.
+
+Generates a random actor/movie dataset in the same CSV format as small/
+and large/, then times loading it and answering a fixed set of random
+queries with breadth-first search, bidirectional search and the CSR
+graph, and writes the results as JSON.
+
+Cast members are drawn with a power-law (Zipf) popularity, so that as in
+the real IMDb data a few actors appear in very many movies.
+
+Usage: python benchmark.py [--people N] [--movies N] [--output FILE] ...
+"""
+import argparse
+import csv
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+import degrees
+import graph
+
+FIRST_NAMES = ["Anna", "Ben", "Carla", "David", "Emma", "Frank", "Grace",
+               "Henry", "Iris", "Jack", "Kate", "Leo", "Maria", "Nick",
+               "Olivia", "Paul", "Rosa", "Sam", "Tom", "Vera"]
+
+LAST_NAMES = ["Adams", "Baker", "Clark", "Davis", "Evans", "Fisher", "Green",
+              "Hill", "Irving", "Jones", "King", "Lewis", "Moore", "Nelson",
+              "Owens", "Parker", "Reed", "Smith", "Turner", "Walker"]
+
+
+def generate_dataset(directory, num_people, num_movies, cast_size=4,
+                     alpha=0.5, seed=0):
+    """
+    Writes people.csv, movies.csv and stars.csv for a random dataset to
+    directory.
+
+    Every movie gets between 1 and 2 * cast_size - 1 stars; the chance
+    that the person of popularity rank r is cast is proportional to
+    r^-alpha (alpha=0 gives uniformly random casts).
+    """
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+
+    with open(os.path.join(directory, "people.csv"), "w",
+              encoding="utf-8", newline="") as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_NONNUMERIC)
+        writer.writerow(["id", "name", "birth"])
+        for person in range(num_people):
+            name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+            if person >= len(FIRST_NAMES) * len(LAST_NAMES):
+                name += f" {person}"
+            writer.writerow([str(person + 1), name, rng.randint(1920, 2010)])
+
+    with open(os.path.join(directory, "movies.csv"), "w",
+              encoding="utf-8", newline="") as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_NONNUMERIC)
+        writer.writerow(["id", "title", "year"])
+        for movie in range(num_movies):
+            writer.writerow([str(movie + 1), f"Movie {movie + 1}",
+                             rng.randint(1930, 2020)])
+
+    # Cumulative popularity weights, shuffled so popularity does not
+    # follow the ids
+    ranks = list(range(1, num_people + 1))
+    rng.shuffle(ranks)
+    cumulative = []
+    total = 0.0
+    for rank in ranks:
+        total += rank ** -alpha
+        cumulative.append(total)
+    population = range(1, num_people + 1)
+
+    with open(os.path.join(directory, "stars.csv"), "w",
+              encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["person_id", "movie_id"])
+        for movie in range(num_movies):
+            size = rng.randint(1, 2 * cast_size - 1)
+            cast = set(rng.choices(population, cum_weights=cumulative, k=size))
+            for person in sorted(cast):
+                writer.writerow([person, movie + 1])
+
+
+def query_pairs(person_ids, count, seed=0):
+    """
+    Returns count random (source, target) pairs of person ids.
+    """
+    rng = random.Random(seed)
+    person_ids = sorted(person_ids, key=int)
+    return [(rng.choice(person_ids), rng.choice(person_ids))
+            for _ in range(count)]
+
+
+def summarize(seconds):
+    """
+    Returns summary statistics of a list of per-query times in seconds.
+    """
+    ordered = sorted(seconds)
+    return {
+        "queries": len(ordered),
+        "total_s": sum(ordered),
+        "mean_ms": 1000 * statistics.mean(ordered),
+        "median_ms": 1000 * statistics.median(ordered),
+        "p95_ms": 1000 * ordered[int(0.95 * (len(ordered) - 1))],
+        "max_ms": 1000 * ordered[-1]
+    }
+
+
+def time_queries(search, pairs):
+    """
+    Runs search(source, target) for every pair; returns the path lengths
+    (None if not connected) and the time of each query.
+    """
+    lengths = []
+    seconds = []
+    for source, target in pairs:
+        start = time.perf_counter()
+        path = search(source, target)
+        seconds.append(time.perf_counter() - start)
+        lengths.append(None if path is None else len(path))
+    return lengths, seconds
+
+
+def reset():
+    """
+    Empties the data loaded into degrees.
+    """
+    degrees.names.clear()
+    degrees.people.clear()
+    degrees.movies.clear()
+
+
+def run(directory, num_queries, seed=0):
+    """
+    Times loading directory and answering num_queries random queries;
+    returns the results as a JSON-serialisable dict.
+    """
+    results = {}
+
+    reset()
+    start = time.perf_counter()
+    degrees.load_data(directory, cache=False)
+    results["load_csv_s"] = time.perf_counter() - start
+    degrees.load_data(directory, cache=True)
+
+    reset()
+    start = time.perf_counter()
+    degrees.load_data(directory, cache=True)
+    results["load_snapshot_s"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    star_graph = graph.load_graph(directory, cache=False)
+    results["load_graph_s"] = time.perf_counter() - start
+
+    results["people"] = len(degrees.people)
+    results["movies"] = len(degrees.movies)
+    results["stars"] = sum(
+        len(movie["stars"]) for movie in degrees.movies.values()
+    )
+
+    pairs = query_pairs(degrees.people, num_queries, seed)
+    engines = {
+        "bfs": degrees.shortest_path,
+        "bidirectional": degrees.bidirectional_shortest_path,
+        "csr_bfs": star_graph.shortest_path
+    }
+    expected = None
+    for name, search in engines.items():
+        lengths, seconds = time_queries(search, pairs)
+        results[name] = summarize(seconds)
+        if expected is None:
+            expected = lengths
+            connected = [length for length in lengths if length is not None]
+            results["connected_pairs"] = len(connected)
+            results["mean_degrees"] = (
+                statistics.mean(connected) if connected else None
+            )
+        elif lengths != expected:
+            sys.exit(f"{name} found different path lengths than bfs")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark degrees search on a synthetic dataset."
+    )
+    parser.add_argument("--people", type=int, default=20000)
+    parser.add_argument("--movies", type=int, default=20000)
+    parser.add_argument("--cast", type=int, default=4,
+                        help="average number of stars per movie")
+    parser.add_argument("--alpha", type=float, default=0.5,
+                        help="power-law exponent of actor popularity")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--directory",
+                        help="where to write the dataset (default: a "
+                             "temporary directory)")
+    parser.add_argument("--output", default="-",
+                        help="file to write the JSON results to")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temporary:
+        directory = args.directory or temporary
+        start = time.perf_counter()
+        generate_dataset(directory, args.people, args.movies,
+                         args.cast, args.alpha, args.seed)
+        generate_s = time.perf_counter() - start
+        results = run(directory, args.queries, args.seed)
+
+    report = {
+        "parameters": {
+            "people": args.people,
+            "movies": args.movies,
+            "cast": args.cast,
+            "alpha": args.alpha,
+            "queries": args.queries,
+            "seed": args.seed
+        },
+        "python": platform.python_version(),
+        "generate_s": generate_s,
+        "results": results
+    }
+    text = json.dumps(report, indent=2)
+    if args.output == "-":
+        print(text)
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
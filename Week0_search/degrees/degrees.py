@@ -1,8 +1,16 @@
-import csv
+import argparse
+import functools
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 
+import ingest
+import lookup
+import service
+import snapshot
 from util import Node, StackFrontier, QueueFrontier
+from util import DequeQueueFrontier, ExploredSet
 
 # Maps names to a set of corresponding person_ids
 names = {}
@@ -13,55 +21,163 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Prefix and fuzzy name lookup over people, built on first use
+_name_index = None
 
-def load_data(directory):
+
+def load_data(directory, cache=True, progress=None):
     """
     Load data from CSV files into memory.
+
+    The files are streamed in chunks; people.csv and movies.csv are read
+    at the same time, and stars.csv is linked to them afterwards. Rows
+    that cannot be used are counted, not silently dropped. Returns an
+    ingest.LoadReport with the counts and throughput of every file;
+    progress(stats) is called after every chunk if given.
+
+    If cache is True, the parsed data is also written to a snapshot next
+    to the CSV files, which later runs load instead of the CSV files for
+    as long as those files are unchanged.
     """
-    # Load people
-    with open(f"{directory}/people.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            people[row["id"]] = {
-                "name": row["name"],
-                "birth": row["birth"],
+    global _name_index
+    _name_index = None
+    start = time.perf_counter()
+    report = ingest.LoadReport()
+    if cache:
+        path = snapshot.snapshot_path(directory, "degrees")
+        key = snapshot.source_key(directory)
+        data = snapshot.load(path, key)
+        if data is not None:
+            names.update(data["names"])
+            people.update(data["people"])
+            movies.update(data["movies"])
+            report.snapshot = path
+            report.seconds = time.perf_counter() - start
+            return report
+
+    # Load people and movies concurrently, then link them through stars
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        loading = [
+            executor.submit(_load_people, directory, progress),
+            executor.submit(_load_movies, directory, progress)
+        ]
+        report.files.extend(future.result() for future in loading)
+    report.files.append(_load_stars(directory, progress))
+
+    if cache:
+        snapshot.save(
+            path, key, {"names": names, "people": people, "movies": movies}
+        )
+    report.seconds = time.perf_counter() - start
+    return report
+
+
+def _load_people(directory, progress):
+    """
+    Loads people.csv into people and names.
+    """
+    stats = ingest.FileStats(f"{directory}/people.csv")
+    columns = ("id", "name", "birth")
+    for chunk in ingest.read_chunks(stats, columns, progress=progress):
+        for person_id, name, birth in chunk:
+            if person_id in people:
+                stats.drop("duplicate id")
+                continue
+            people[person_id] = {
+                "name": name,
+                "birth": birth,
                 "movies": set()
             }
-            if row["name"].lower() not in names:
-                names[row["name"].lower()] = {row["id"]}
-            else:
-                names[row["name"].lower()].add(row["id"])
-
-    # Load movies
-    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            movies[row["id"]] = {
-                "title": row["title"],
-                "year": row["year"],
+            names.setdefault(name.lower(), set()).add(person_id)
+    return stats
+
+
+def _load_movies(directory, progress):
+    """
+    Loads movies.csv into movies.
+    """
+    stats = ingest.FileStats(f"{directory}/movies.csv")
+    columns = ("id", "title", "year")
+    for chunk in ingest.read_chunks(stats, columns, progress=progress):
+        for movie_id, title, year in chunk:
+            if movie_id in movies:
+                stats.drop("duplicate id")
+                continue
+            movies[movie_id] = {
+                "title": title,
+                "year": year,
                 "stars": set()
             }
+    return stats
 
-    # Load stars
-    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            try:
-                people[row["person_id"]]["movies"].add(row["movie_id"])
-                movies[row["movie_id"]]["stars"].add(row["person_id"])
-            except KeyError:
-                pass
+
+def _load_stars(directory, progress):
+    """
+    Loads stars.csv, linking people and movies.
+    """
+    stats = ingest.FileStats(f"{directory}/stars.csv")
+    columns = ("person_id", "movie_id")
+    for chunk in ingest.read_chunks(stats, columns, progress=progress):
+        for person_id, movie_id in chunk:
+            person = people.get(person_id)
+            movie = movies.get(movie_id)
+            if person is None:
+                stats.drop("unknown person_id")
+            elif movie is None:
+                stats.drop("unknown movie_id")
+            else:
+                person["movies"].add(movie_id)
+                movie["stars"].add(person_id)
+    return stats
 
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    parser = argparse.ArgumentParser(
+        usage="python degrees.py [directory] [--batch FILE | --serve PORT]"
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="answer tab-separated name pairs from FILE "
+                             "('-' for stdin) as JSON lines")
+    parser.add_argument("--output", metavar="FILE", default="-",
+                        help="where --batch writes its JSON lines")
+    parser.add_argument("--processes", metavar="N", type=int, default=1,
+                        help="number of worker processes for --batch "
+                             "(0 for one per core)")
+    parser.add_argument("--serve", metavar="PORT", type=int,
+                        help="answer queries over HTTP on PORT")
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="address --serve listens on")
+    args = parser.parse_args()
+    if args.batch is not None and args.serve is not None:
+        parser.error("--batch and --serve cannot be combined")
+
+    # Load data from files into memory; in batch and server mode stdout
+    # is reserved for answers, so progress goes to stderr
+    status = sys.stdout
+    if args.batch is not None or args.serve is not None:
+        status = sys.stderr
+    print("Loading data...", file=status)
+    progress = _print_progress if sys.stderr.isatty() else None
+    report = load_data(args.directory, progress=progress)
+    print(report, file=status)
+    print("Data loaded.", file=status)
 
-    # Load data from files into memory
-    print("Loading data...")
-    load_data(directory)
-    print("Data loaded.")
+    if args.batch is not None or args.serve is not None:
+        # Build the name index once, before any worker processes fork
+        name_index()
+
+    if args.batch is not None:
+        with service.open_text(args.batch, "r") as infile, \
+                service.open_text(args.output, "w") as outfile:
+            service.run_batch(
+                infile, outfile, answer, processes=args.processes or None
+            )
+        return
+    if args.serve is not None:
+        print(f"Serving on http://{args.host}:{args.serve}/path", file=status)
+        service.serve(args.host, args.serve, answer, person_candidates)
+        return
 
     source = person_id_for_name(input("Name: "))
     if source is None:
@@ -85,31 +201,35 @@ def main():
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
-def shortest_path(source, target):
+def shortest_path(source, target, bidirectional=False):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
+    If bidirectional is True, the search runs from both ends at once
+    (see bidirectional_shortest_path).
+
     If no possible path, returns None.
     """
-    
+    if bidirectional:
+        return bidirectional_shortest_path(source, target)
+
     # Initialize frontier to just the starting position
     # State is just id person, but path needs to be id movie + id person
     start = Node(state=source, parent=None, action=None)
-    frontier = QueueFrontier()
+    frontier = DequeQueueFrontier()
     frontier.add(start)
 
 
     # Initialize an empty explored set, and an empty path
     path=[]
-    explored = []
+    explored = ExploredSet()
     
     # Keep looping until solution found
     while True: 
     
        #If nothing left, then no path:
        if frontier.empty():
-          print('frontier is empty!')           
           path_bad=None
           return(path_bad)            
                        
@@ -118,8 +238,6 @@ def shortest_path(source, target):
        
        #Check if node is goal:
        if node.state == target:
-          print('we found a solution!')
-
           while node.parent is not None:
              path.append((node.action,node.state))
              node = node.parent                        
@@ -137,14 +255,199 @@ def shortest_path(source, target):
               child = Node(state=state, parent=node, action=action)     
               frontier.add(child)
 
-      
+
+
+def bidirectional_shortest_path(source, target):
+    """
+    Returns the same path as shortest_path, but grows one breadth-first
+    search from the source and one from the target until they meet.
+
+    Each round expands a full layer of the smaller frontier, so a path of
+    length d only touches about 2 * b^(d/2) people instead of b^d.
+
+    If no possible path, returns None.
+    """
+    if source == target:
+        return []
+
+    # For every person reached, remember how we got there:
+    # forward maps person -> (movie, person one step closer to the source),
+    # backward maps person -> (movie, person one step closer to the target)
+    forward = {source: None}
+    backward = {target: None}
+    forward_layer = [source]
+    backward_layer = [target]
+
+    while forward_layer and backward_layer:
+
+        # Always expand the cheaper side
+        if len(forward_layer) <= len(backward_layer):
+            forward_layer, meeting = _expand_layer(
+                forward_layer, forward, backward
+            )
+        else:
+            backward_layer, meeting = _expand_layer(
+                backward_layer, backward, forward
+            )
+
+        if meeting is not None:
+            return _join_paths(meeting, forward, backward)
+
+    return None
+
+
+def _expand_layer(layer, parents, other_parents):
+    """
+    Expands every person in layer by one step, recording parents.
+
+    Returns the next layer and the best meeting point with the other
+    search (None if the searches did not meet).
+    The whole layer is expanded before deciding, so that the meeting
+    point with the shortest total path is chosen.
+    """
+    next_layer = []
+    meeting = None
+    best = None
+    for person_id in layer:
+        for movie_id, neighbor in neighbors_for_person(person_id):
+            if neighbor in parents:
+                continue
+            parents[neighbor] = (movie_id, person_id)
+            next_layer.append(neighbor)
+            if neighbor in other_parents:
+                length = _depth(neighbor, other_parents)
+                if best is None or length < best:
+                    best = length
+                    meeting = neighbor
+    return next_layer, meeting
+
+
+def _depth(person_id, parents):
+    """
+    Returns the number of steps from person_id to the root of parents.
+    """
+    depth = 0
+    while parents[person_id] is not None:
+        person_id = parents[person_id][1]
+        depth += 1
+    return depth
+
+
+def _join_paths(meeting, forward, backward):
+    """
+    Builds the (movie_id, person_id) path from the source to the target
+    through the person where the two searches met.
+    """
+    path = []
+    person_id = meeting
+    while forward[person_id] is not None:
+        movie_id, parent = forward[person_id]
+        path.append((movie_id, person_id))
+        person_id = parent
+    path.reverse()
+
+    person_id = meeting
+    while backward[person_id] is not None:
+        movie_id, child = backward[person_id]
+        path.append((movie_id, child))
+        person_id = child
+    return path
+
+
+def _print_progress(stats):
+    """
+    Prints how far loading one file has got.
+    """
+    print(f"  {stats.filename}: {stats.rows:,} rows, "
+          f"{stats.bytes_read / 1e6:.1f} MB", file=sys.stderr)
+
+
+def shortest_paths(pairs, processes=None, bidirectional=False):
+    """
+    Returns shortest_path(source, target) for every (source, target)
+    pair, in input order.
+
+    The pairs are solved concurrently by processes worker processes
+    (one per core by default), which share the already loaded data.
+    """
+    search = functools.partial(shortest_path, bidirectional=bidirectional)
+    return list(service.solve_many(search, pairs, processes=processes))
+
+
+def answer(source_name, target_name):
+    """
+    Answers one query without prompting, as a JSON-serialisable dict.
+
+    Names that match no one or several people are reported in "error"
+    instead of asking which person was meant, together with ranked
+    "candidates" (see person_candidates) to choose from.
+    """
+    result = {"source": source_name, "target": target_name}
+    person_ids = []
+    for name in (source_name, target_name):
+        matches = person_ids_for_name(name)
+        if len(matches) != 1:
+            if matches:
+                result["error"] = f"ambiguous name: {name}"
+            else:
+                result["error"] = f"person not found: {name}"
+            result["candidates"] = person_candidates(name)
+            return result
+        person_ids.append(matches[0])
+
+    result["source_id"], result["target_id"] = person_ids
+    path = shortest_path(*person_ids)
+    if path is None:
+        result["degrees"] = None
+        result["path"] = None
+    else:
+        result["degrees"] = len(path)
+        result["path"] = [
+            {"movie_id": movie_id,
+             "movie": movies[movie_id]["title"],
+             "person_id": person_id,
+             "person": people[person_id]["name"]}
+            for movie_id, person_id in path
+        ]
+    return result
+
+
+def name_index():
+    """
+    Returns the lookup.NameIndex over the loaded people, building it on
+    first use.
+    """
+    global _name_index
+    if _name_index is None:
+        _name_index = lookup.NameIndex(people)
+    return _name_index
+
+
+def person_candidates(name, limit=10):
+    """
+    Returns up to limit people that name may refer to, best match first,
+    as dicts with their id, name, birth year and number of movies.
+
+    Exact matches come first, then names starting with name, then names
+    that are spelled similarly, so typos and partial names still find
+    the intended person without prompting.
+    """
+    return name_index().search(name, limit)
+
+
+def person_ids_for_name(name):
+    """
+    Returns the IMDB ids of every person with the given name.
+    """
+    return list(names.get(name.lower(), set()))
+
 
 def person_id_for_name(name):
     """
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
     """
-    person_ids = list(names.get(name.lower(), set()))
+    person_ids = person_ids_for_name(name)
     if len(person_ids) == 0:
         return None
     elif len(person_ids) > 1:
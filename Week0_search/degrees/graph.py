@@ -0,0 +1,354 @@
+"""
+Compact, integer-indexed version of the degrees dataset.
+
+People and movies are interned to dense integers (their row in
+people.csv / movies.csv) and the bipartite star graph is stored as two
+CSR (compressed sparse row) structures:
+
+    person_indptr / person_movies   person -> movies they starred in
+    movie_indptr / movie_people     movie -> people who starred in it
+
+The movies of person i are person_movies[person_indptr[i]:person_indptr[i + 1]],
+so expanding a person is a single slice of a contiguous array.
+
+Everything else is stored as arrays too, not as Python objects per row:
+IMDB ids (which are numeric) as integers, birth and release years as
+int16 (0 if unknown), and names and titles packed into one UTF-8 string
+with an array of offsets (pack_strings).
+"""
+import csv
+
+import numpy as np
+
+import snapshot
+
+
+def pack_strings(strings):
+    """
+    Returns (data, offsets) for a list of strings: their UTF-8 encodings
+    joined into one bytes object, and where each one starts and ends
+    (string i is data[offsets[i]:offsets[i + 1]]).
+    """
+    encoded = [string.encode("utf-8") for string in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(string) for string in encoded], out=offsets[1:])
+    return b"".join(encoded), offsets
+
+
+def unpack_string(packed, i):
+    """
+    Returns string i of strings packed by pack_strings.
+    """
+    data, offsets = packed
+    return data[offsets[i]:offsets[i + 1]].decode("utf-8")
+
+
+def _years(values):
+    """
+    Returns the years in values (strings, empty if unknown) as an int16
+    array with 0 for unknown years.
+    """
+    return np.array([int(value) if value else 0 for value in values],
+                    dtype=np.int16)
+
+
+class StarGraph():
+    """
+    The degrees dataset, stored as CSR arrays over integer ids.
+    """
+
+    def __init__(self, person_ids, person_names, person_births,
+                 movie_ids, movie_titles, movie_years,
+                 person_indptr, person_movies, movie_indptr, movie_people):
+        # person_ids and movie_ids are integer arrays, person_names and
+        # movie_titles packed strings, person_births and movie_years int16
+        self.person_ids = person_ids
+        self.person_names = person_names
+        self.person_births = person_births
+        self.movie_ids = movie_ids
+        self.movie_titles = movie_titles
+        self.movie_years = movie_years
+        self.person_indptr = person_indptr
+        self.person_movies = person_movies
+        self.movie_indptr = movie_indptr
+        self.movie_people = movie_people
+
+        # Orders that sort the ids, to find an id's dense index by binary
+        # search rather than through a dict of every id
+        self.person_order = np.argsort(person_ids, kind="stable")
+        self.movie_order = np.argsort(movie_ids, kind="stable")
+
+        # Maps lowercase names to a list of person indices, built the
+        # first time a name is looked up
+        self._names = None
+
+    def arrays(self):
+        """
+        Returns the lists and arrays the graph is built from, in the order
+        of the constructor's arguments; these are what gets snapshotted,
+        rather than the StarGraph object itself.
+        """
+        return (self.person_ids, self.person_names, self.person_births,
+                self.movie_ids, self.movie_titles, self.movie_years,
+                self.person_indptr, self.person_movies,
+                self.movie_indptr, self.movie_people)
+
+    @property
+    def num_people(self):
+        return len(self.person_ids)
+
+    @property
+    def num_movies(self):
+        return len(self.movie_ids)
+
+    @property
+    def names(self):
+        if self._names is None:
+            self._names = {}
+            for i in range(self.num_people):
+                name = unpack_string(self.person_names, i).lower()
+                self._names.setdefault(name, []).append(i)
+        return self._names
+
+    def person_index(self, person_id):
+        """
+        Returns the dense index of the person with the given IMDB id.
+        Raises KeyError if there is none.
+        """
+        return _find(self.person_ids, self.person_order, person_id)
+
+    def movie_index(self, movie_id):
+        """
+        Returns the dense index of the movie with the given IMDB id.
+        Raises KeyError if there is none.
+        """
+        return _find(self.movie_ids, self.movie_order, movie_id)
+
+    def person_name(self, person):
+        return unpack_string(self.person_names, person)
+
+    def movie_title(self, movie):
+        return unpack_string(self.movie_titles, movie)
+
+    def person_ids_for_name(self, name):
+        """
+        Returns the IMDB ids of every person with the given name.
+        """
+        return [str(self.person_ids[i])
+                for i in self.names.get(name.lower(), [])]
+
+    def movies_for_person(self, person):
+        """
+        Returns the movie indices of the person with index person.
+        """
+        start, end = self.person_indptr[person], self.person_indptr[person + 1]
+        return self.person_movies[start:end]
+
+    def people_for_movie(self, movie):
+        """
+        Returns the person indices of the stars of the movie with index movie.
+        """
+        start, end = self.movie_indptr[movie], self.movie_indptr[movie + 1]
+        return self.movie_people[start:end]
+
+    def neighbors_for_person(self, person_id):
+        """
+        Returns (movie_id, person_id) pairs for people
+        who starred with a given person.
+        """
+        person = self.person_index(person_id)
+        neighbors = set()
+        for movie in self.movies_for_person(person):
+            movie_id = str(self.movie_ids[movie])
+            for star in self.people_for_movie(movie):
+                neighbors.add((movie_id, str(self.person_ids[star])))
+        return neighbors
+
+    def shortest_path(self, source, target):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target.
+
+        The breadth-first search expands a whole layer at a time with
+        array operations: all movies of the frontier, then all stars of
+        those movies.
+
+        If no possible path, returns None.
+        """
+        start = self.person_index(source)
+        goal = self.person_index(target)
+        if start == goal:
+            return []
+
+        # For every person reached, the movie they were reached through,
+        # and for every movie reached, the person it was reached from
+        person_parent = np.full(self.num_people, -1, dtype=np.int32)
+        movie_parent = np.full(self.num_movies, -1, dtype=np.int32)
+        seen_people = np.zeros(self.num_people, dtype=bool)
+        seen_movies = np.zeros(self.num_movies, dtype=bool)
+        seen_people[start] = True
+
+        frontier = np.array([start], dtype=np.int32)
+        while frontier.size:
+
+            # Movies of the frontier that were not reached before
+            movies, owners = _expand(
+                self.person_indptr, self.person_movies, frontier
+            )
+            new = ~seen_movies[movies]
+            movies, owners = movies[new], owners[new]
+            movie_parent[movies] = owners
+            seen_movies[movies] = True
+            movies = np.unique(movies)
+
+            # Stars of those movies that were not reached before
+            people, via = _expand(self.movie_indptr, self.movie_people, movies)
+            new = ~seen_people[people]
+            people, via = people[new], via[new]
+            person_parent[people] = via
+            seen_people[people] = True
+
+            if seen_people[goal]:
+                return self._path(start, goal, person_parent, movie_parent)
+
+            frontier = np.unique(people)
+
+        return None
+
+    def _path(self, start, goal, person_parent, movie_parent):
+        """
+        Follows the parent arrays back from goal to start.
+        """
+        path = []
+        person = goal
+        while person != start:
+            movie = person_parent[person]
+            path.append((str(self.movie_ids[movie]),
+                         str(self.person_ids[person])))
+            person = movie_parent[movie]
+        path.reverse()
+        return path
+
+
+def _find(ids, order, key):
+    """
+    Returns the index of key (an IMDB id, as a string or integer) in ids,
+    which order sorts. Raises KeyError if it is not there.
+    """
+    try:
+        value = int(key)
+    except ValueError:
+        raise KeyError(key) from None
+    i = np.searchsorted(ids, value, sorter=order)
+    if i == len(ids) or ids[order[i]] != value:
+        raise KeyError(key)
+    return int(order[i])
+
+
+def _expand(indptr, indices, rows):
+    """
+    Returns the concatenated CSR rows of rows, together with the row
+    each entry came from.
+    """
+    starts = indptr[rows]
+    counts = indptr[rows + 1] - starts
+    owners = np.repeat(rows, counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    return indices[np.repeat(starts, counts) + offsets], owners
+
+
+def _csr(rows, columns, num_rows):
+    """
+    Builds (indptr, indices) from unique (row, column) pairs sorted by row.
+    """
+    counts = np.bincount(rows, minlength=num_rows)
+    indptr = np.zeros(num_rows + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+    return indptr, columns.astype(np.int32)
+
+
+def _lookup(ids, keys):
+    """
+    Returns the index in ids of every id in keys, or -1 for those that
+    are not in ids.
+    """
+    if not len(ids):
+        return np.full(len(keys), -1, dtype=np.int64)
+    order = np.argsort(ids, kind="stable")
+    positions = np.searchsorted(ids, keys, sorter=order)
+    found = order[np.minimum(positions, len(ids) - 1)]
+    return np.where(ids[found] == keys, found, -1)
+
+
+def load_graph(directory, cache=True):
+    """
+    Load data from CSV files into a StarGraph.
+
+    If cache is True, the graph is snapshotted next to the CSV files and
+    reloaded from there as long as those files are unchanged.
+    """
+    if cache:
+        path = snapshot.snapshot_path(directory, "graph")
+        key = snapshot.source_key(directory)
+        arrays = snapshot.load(path, key)
+        if arrays is not None:
+            return StarGraph(*arrays)
+
+    # Load people
+    person_ids, person_names, person_births = [], [], []
+    with open(f"{directory}/people.csv", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            person_ids.append(int(row["id"]))
+            person_names.append(row["name"])
+            person_births.append(row["birth"])
+    person_ids = np.array(person_ids, dtype=np.int64)
+    person_names = pack_strings(person_names)
+    person_births = _years(person_births)
+
+    # Load movies
+    movie_ids, movie_titles, movie_years = [], [], []
+    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            movie_ids.append(int(row["id"]))
+            movie_titles.append(row["title"])
+            movie_years.append(row["year"])
+    movie_ids = np.array(movie_ids, dtype=np.int64)
+    movie_titles = pack_strings(movie_titles)
+    movie_years = _years(movie_years)
+
+    # Load stars, skipping rows that refer to unknown people or movies
+    star_people, star_movies = [], []
+    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            try:
+                person_id = int(row["person_id"])
+                movie_id = int(row["movie_id"])
+            except ValueError:
+                continue
+            star_people.append(person_id)
+            star_movies.append(movie_id)
+    people = _lookup(person_ids, np.array(star_people, dtype=np.int64))
+    movies = _lookup(movie_ids, np.array(star_movies, dtype=np.int64))
+    known = (people >= 0) & (movies >= 0)
+    people, movies = people[known], movies[known]
+
+    # Drop duplicate edges and sort them once per direction
+    edges = np.unique(people * len(movie_ids) + movies)
+    people, movies = np.divmod(edges, len(movie_ids))
+    person_indptr, person_movies = _csr(people, movies, len(person_ids))
+    order = np.argsort(movies, kind="stable")
+    movie_indptr, movie_people = _csr(
+        movies[order], people[order], len(movie_ids)
+    )
+
+    graph = StarGraph(
+        person_ids, person_names, person_births,
+        movie_ids, movie_titles, movie_years,
+        person_indptr, person_movies, movie_indptr, movie_people
+    )
+    if cache:
+        snapshot.save(path, key, graph.arrays())
+    return graph
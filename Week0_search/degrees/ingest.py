@@ -0,0 +1,139 @@
+"""
+Streaming CSV ingestion with data-quality and throughput statistics.
+
+read_chunks reads a CSV file in chunks of plain tuples (instead of one
+dict per row), counts the rows it has to reject and why, and keeps
+per-file timing so load times can be reported as rows/s and MB/s.
+"""
+import csv
+import os
+import time
+from collections import Counter
+
+# Number of rows handed to the caller at a time
+CHUNK_SIZE = 50000
+
+
+class FileStats():
+    """
+    Counts and timing for reading one CSV file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.rows = 0
+        self.rejected = Counter()
+        self.bytes_read = 0
+        self.seconds = 0.0
+
+    @property
+    def filename(self):
+        return os.path.basename(self.path)
+
+    @property
+    def total_rejected(self):
+        return sum(self.rejected.values())
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    @property
+    def mb_per_second(self):
+        return self.bytes_read / 1e6 / self.seconds if self.seconds else 0.0
+
+    def reject(self, reason):
+        """
+        Counts one row that was rejected while reading.
+        """
+        self.rejected[reason] += 1
+
+    def drop(self, reason):
+        """
+        Counts one row that was read, but then rejected by the caller.
+        """
+        self.rows -= 1
+        self.rejected[reason] += 1
+
+    def __str__(self):
+        line = (f"{self.filename}: {self.rows} rows, "
+                f"{self.total_rejected} rejected, "
+                f"{self.seconds:.2f}s ({self.rows_per_second:,.0f} rows/s, "
+                f"{self.mb_per_second:.1f} MB/s)")
+        if self.rejected:
+            reasons = ", ".join(
+                f"{count} {reason}"
+                for reason, count in self.rejected.most_common()
+            )
+            line += f" [rejected: {reasons}]"
+        return line
+
+
+class LoadReport():
+    """
+    The FileStats of every file of one load, or the snapshot it came from.
+    """
+
+    def __init__(self):
+        self.files = []
+        self.snapshot = None
+        self.seconds = 0.0
+
+    def __str__(self):
+        if self.snapshot is not None:
+            return f"Loaded snapshot {self.snapshot} in {self.seconds:.2f}s"
+        lines = [str(stats) for stats in self.files]
+        lines.append(f"Total: {self.seconds:.2f}s")
+        return "\n".join(lines)
+
+
+def read_chunks(stats, columns, chunk_size=CHUNK_SIZE, progress=None):
+    """
+    Yields lists of up to chunk_size tuples holding the given columns of
+    each row of the CSV file at stats.path.
+
+    Rows with the wrong number of fields or an empty first column are
+    counted in stats.rejected instead of being yielded. Rows that the
+    caller rejects later should be counted with stats.drop.
+    After every chunk, progress(stats) is called if given.
+    """
+    start = time.perf_counter()
+    with open(stats.path, encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        missing = [column for column in columns if column not in header]
+        if missing:
+            raise ValueError(
+                f"{stats.path} is missing columns: {', '.join(missing)}"
+            )
+        positions = [header.index(column) for column in columns]
+        width = len(header)
+
+        chunk = []
+        for row in reader:
+            if not row:
+                continue
+            if len(row) != width:
+                stats.reject("wrong number of fields")
+                continue
+            values = tuple(row[position] for position in positions)
+            if not values[0]:
+                stats.reject(f"empty {columns[0]}")
+                continue
+            chunk.append(values)
+            if len(chunk) >= chunk_size:
+                stats.rows += len(chunk)
+                stats.bytes_read = f.buffer.tell()
+                stats.seconds = time.perf_counter() - start
+                yield chunk
+                if progress is not None:
+                    progress(stats)
+                chunk = []
+
+        stats.rows += len(chunk)
+        if chunk:
+            yield chunk
+    stats.bytes_read = os.path.getsize(stats.path)
+    stats.seconds = time.perf_counter() - start
+    if progress is not None:
+        progress(stats)
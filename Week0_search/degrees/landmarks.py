@@ -0,0 +1,238 @@
+"""
+Single-source distances and a landmark index for the degrees dataset.
+
+The landmark index stores, for a handful of well-connected "hub" actors,
+the distance from that actor to every other person. By the triangle
+inequality, for any landmark L and people a and b:
+
+    |d(L, a) - d(L, b)| <= d(a, b) <= d(L, a) + d(L, b)
+
+which gives instant lower and upper bounds on the degrees of separation,
+and the lower bound is an admissible heuristic for an A* search between
+two people (the ALT algorithm).
+
+Works on the data loaded into degrees by degrees.load_data.
+"""
+import heapq
+import itertools
+import math
+from collections import deque
+
+import numpy as np
+
+import degrees
+import snapshot
+
+# Distance stored for people a landmark cannot reach
+UNREACHABLE = -1
+
+
+def single_source(source):
+    """
+    Runs a breadth-first search from source over the whole graph.
+
+    Returns (distances, predecessors): distances maps every reachable
+    person_id to its degrees of separation from source, and predecessors
+    maps it to the (movie_id, person_id) step it was reached through
+    (None for the source itself).
+    """
+    distances = {source: 0}
+    predecessors = {source: None}
+    # People are dequeued in order of distance, so the first time a movie
+    # is expanded all its stars get their final distance; it never needs
+    # to be looked at again
+    expanded = set()
+    queue = deque([source])
+    while queue:
+        person_id = queue.popleft()
+        distance = distances[person_id] + 1
+        for movie_id in degrees.people[person_id]["movies"]:
+            if movie_id in expanded:
+                continue
+            expanded.add(movie_id)
+            for neighbor in degrees.movies[movie_id]["stars"]:
+                if neighbor not in distances:
+                    distances[neighbor] = distance
+                    predecessors[neighbor] = (movie_id, person_id)
+                    queue.append(neighbor)
+    return distances, predecessors
+
+
+def path_to(predecessors, target):
+    """
+    Returns the (movie_id, person_id) path from the source of
+    single_source to target, or None if target was not reached.
+    """
+    if target not in predecessors:
+        return None
+    path = []
+    while predecessors[target] is not None:
+        movie_id, parent = predecessors[target]
+        path.append((movie_id, target))
+        target = parent
+    path.reverse()
+    return path
+
+
+def hubs(count):
+    """
+    Returns the count people with the most co-star appearances,
+    most connected first.
+    """
+    def connections(person_id):
+        return sum(
+            len(degrees.movies[movie_id]["stars"]) - 1
+            for movie_id in degrees.people[person_id]["movies"]
+        )
+    return heapq.nlargest(count, degrees.people, key=connections)
+
+
+class LandmarkIndex():
+    """
+    Distances from a few landmark people to everyone else.
+    """
+
+    def __init__(self, person_ids, landmarks, distances):
+        # distances[i][j] is the distance from landmarks[i] to person_ids[j]
+        self.person_ids = person_ids
+        self.landmarks = landmarks
+        self.distances = distances
+        self.person_index = {
+            person_id: j for j, person_id in enumerate(person_ids)
+        }
+        # The same distances with one contiguous row per person, converted
+        # once, so the search reads a person's K distances at a time.
+        # Degrees of separation are far below the int16 limit, so their
+        # differences need no wider type
+        self.by_person = np.ascontiguousarray(distances.T)
+
+    @classmethod
+    def build(cls, count=16, landmarks=None):
+        """
+        Runs one breadth-first search per landmark; by default the
+        landmarks are the count best connected people.
+        """
+        if landmarks is None:
+            landmarks = hubs(count)
+        person_ids = list(degrees.people)
+        person_index = {person_id: j for j, person_id in enumerate(person_ids)}
+        distances = np.full(
+            (len(landmarks), len(person_ids)), UNREACHABLE, dtype=np.int16
+        )
+        for i, landmark in enumerate(landmarks):
+            reached, _ = single_source(landmark)
+            columns = np.fromiter(
+                map(person_index.__getitem__, reached), dtype=np.intp,
+                count=len(reached)
+            )
+            distances[i, columns] = np.fromiter(
+                reached.values(), dtype=np.int16, count=len(reached)
+            )
+        return cls(person_ids, list(landmarks), distances)
+
+    @classmethod
+    def load_or_build(cls, directory, count=16):
+        """
+        Returns the index for the data in directory, loading it from its
+        snapshot if that is still up to date, and building and saving it
+        otherwise. The data must already be loaded with degrees.load_data.
+        """
+        path = snapshot.snapshot_path(directory, "landmarks")
+        key = (snapshot.source_key(directory), count)
+        data = snapshot.load(path, key)
+        if data is not None:
+            return cls(*data)
+        index = cls.build(count)
+        snapshot.save(
+            path, key, (index.person_ids, index.landmarks, index.distances)
+        )
+        return index
+
+    def _columns(self, person_id):
+        return self.by_person[self.person_index[person_id]]
+
+    def bounds(self, source, target):
+        """
+        Returns (lower, upper) bounds on the degrees of separation between
+        source and target. Both are math.inf if a landmark shows that the
+        two are not connected, and upper is math.inf if no landmark
+        reaches them.
+        """
+        a = self._columns(source).astype(np.int32)
+        b = self._columns(target).astype(np.int32)
+        reach_a = a != UNREACHABLE
+        reach_b = b != UNREACHABLE
+        if np.any(reach_a != reach_b):
+            return math.inf, math.inf
+        both = reach_a & reach_b
+        if not np.any(both):
+            return 0, math.inf
+        lower = int(np.max(np.abs(a[both] - b[both])))
+        upper = int(np.min(a[both] + b[both]))
+        return lower, upper
+
+    def shortest_path(self, source, target):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target, using an A* search guided
+        by the landmark lower bounds.
+
+        If no possible path, returns None.
+        """
+        if target not in self.person_index:
+            return None
+        if self.bounds(source, target)[0] == math.inf:
+            return None
+        goal = self._columns(target)
+
+        counter = itertools.count()
+        distances = {source: 0}
+        predecessors = {source: None}
+        # Among equal estimates, expand the person furthest from the source
+        # first: on this graph many people tie, and the deepest is the one
+        # closest to the target
+        frontier = [(0, 0, next(counter), source)]
+        while frontier:
+            _, distance, _, person_id = heapq.heappop(frontier)
+            distance = -distance
+            if distance > distances[person_id]:
+                # Reached at a shorter distance since this entry was pushed
+                continue
+            if person_id == target:
+                return path_to(predecessors, target)
+            distance += 1
+            reached = {}
+            for movie_id in degrees.people[person_id]["movies"]:
+                for neighbor in degrees.movies[movie_id]["stars"]:
+                    if (neighbor not in reached
+                            and distance < distances.get(neighbor, math.inf)):
+                        reached[neighbor] = movie_id
+            if not reached:
+                continue
+            # Bounds only for the people reached, all of them at once
+            estimates = self.lower_bounds(goal, list(reached))
+            for (neighbor, movie_id), estimate in zip(reached.items(),
+                                                      estimates):
+                distances[neighbor] = distance
+                predecessors[neighbor] = (movie_id, person_id)
+                heapq.heappush(frontier, (
+                    distance + estimate, -distance, next(counter), neighbor
+                ))
+        return None
+
+    def lower_bounds(self, goal, person_ids):
+        """
+        Returns the landmark lower bound on the distance from each of
+        person_ids to the target whose landmark distances are goal, as a
+        list: the largest |d(L, person) - d(L, target)| over the
+        landmarks L.
+
+        The people must be connected to the target (as everyone the
+        search reaches from a connected source is), so the landmarks that
+        cannot reach them are exactly those that cannot reach the target,
+        and those contribute UNREACHABLE - UNREACHABLE = 0.
+        """
+        rows = self.by_person[[self.person_index[p] for p in person_ids]]
+        if not rows.shape[1]:
+            return [0] * len(person_ids)
+        return np.abs(rows - goal).max(axis=1).tolist()
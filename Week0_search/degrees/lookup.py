@@ -0,0 +1,189 @@
+"""
+Prefix and typo-tolerant lookup of people by name.
+
+NameIndex keeps every distinct lowercase name in sorted lists, one per
+name length, so the shortest names starting with a prefix are a few
+binary searches away, and a trigram index (the three-letter pieces of
+every name) for finding names that are spelled slightly differently.
+Lookups never prompt: they return ranked candidates, each with the
+person's birth year, for the caller to choose from.
+"""
+import bisect
+import heapq
+from collections import Counter
+
+# Posting lists longer than this fraction of all names (trigrams such as
+# " jo") say little about a name and are skipped when there are others
+COMMON_TRIGRAM = 0.05
+
+# Number of names gathered from the trigram index that are scored
+MAX_SCORED = 50
+
+# Most posting list entries counted per fuzzy lookup: the rarest lists are
+# counted whole while they fit, and only the rarest of all is cut short
+MAX_COUNTED = 4000
+
+# Shorter names are not looked up by similarity: nearly every name would
+# match them a little
+MIN_FUZZY_LENGTH = 3
+
+# Minimum trigram similarity for a fuzzy match
+MIN_SIMILARITY = 0.3
+
+
+def trigrams(name):
+    """
+    Returns the set of trigrams of a lowercase name, padded so that the
+    start and end of the name count as well.
+    """
+    padded = f"  {name} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class NameIndex():
+    """
+    Prefix and trigram index over the names of people.
+    """
+
+    def __init__(self, people):
+        # people maps person_id to a dict with at least name and birth,
+        # as in degrees.people
+        self.people = people
+        by_name = {}
+        for person_id, person in people.items():
+            by_name.setdefault(person["name"].lower(), []).append(person_id)
+
+        self.names = sorted(by_name)
+        self.person_ids = [by_name[name] for name in self.names]
+        self.postings = {}
+        self.sizes = []
+        for i, name in enumerate(self.names):
+            name_trigrams = trigrams(name)
+            self.sizes.append(len(name_trigrams))
+            for trigram in name_trigrams:
+                self.postings.setdefault(trigram, []).append(i)
+
+        # The names of every length, in sorted order, and their indices
+        self.length_names = {}
+        self.length_indices = {}
+        for i, name in enumerate(self.names):
+            self.length_names.setdefault(len(name), []).append(name)
+            self.length_indices.setdefault(len(name), []).append(i)
+        self.lengths = sorted(self.length_names)
+
+    def _candidates(self, indices, score):
+        """
+        Returns the people with the names at indices as candidate dicts.
+        """
+        candidates = []
+        for i in indices:
+            for person_id in self.person_ids[i]:
+                person = self.people[person_id]
+                candidates.append({
+                    "id": person_id,
+                    "name": person["name"],
+                    "birth": person["birth"],
+                    "movies": len(person.get("movies", ())),
+                    "score": score(i)
+                })
+
+        # Best match first, and among equal matches the most prolific
+        candidates.sort(key=lambda c: (-c["score"], -c["movies"], c["name"]))
+        return candidates
+
+    def exact(self, name):
+        """
+        Returns the candidates whose name is exactly name, ignoring case.
+        """
+        name = name.lower()
+        i = bisect.bisect_left(self.names, name)
+        if i < len(self.names) and self.names[i] == name:
+            return self._candidates([i], lambda i: 1.0)
+        return []
+
+    def complete(self, prefix, limit=10):
+        """
+        Returns up to limit candidates whose name starts with prefix,
+        shorter (closer) names first.
+        """
+        prefix = prefix.lower()
+        indices = []
+        # Shortest names first: search the names of each length in turn
+        # until there are enough, instead of sorting all matches
+        for length in self.lengths:
+            if len(indices) >= limit:
+                break
+            if length < len(prefix):
+                continue
+            names = self.length_names[length]
+            start = bisect.bisect_left(names, prefix)
+            end = bisect.bisect_left(
+                names, prefix + "\uffff",
+                start, min(len(names), start + limit - len(indices))
+            )
+            indices.extend(self.length_indices[length][start:end])
+        return self._candidates(
+            indices, lambda i: len(prefix) / len(self.names[i])
+        )[:limit]
+
+    def fuzzy(self, name, limit=10):
+        """
+        Returns up to limit candidates whose name is similar to name,
+        ranked by the Dice similarity of their trigrams.
+
+        Names sharing the query's rarer trigrams are gathered from the
+        trigram index first, rarest trigram first and at most MAX_COUNTED
+        entries in all; only the most promising of those are scored.
+        """
+        if len(name.strip()) < MIN_FUZZY_LENGTH:
+            return []
+        query = trigrams(name.lower())
+        postings = sorted(
+            (self.postings[t] for t in query if t in self.postings), key=len
+        )
+        common = COMMON_TRIGRAM * len(self.names)
+        rare = [p for p in postings if len(p) <= common]
+        counts = Counter()
+        budget = MAX_COUNTED
+        for posting in rare or postings:
+            if len(posting) > budget:
+                if not counts:
+                    counts.update(posting[:budget])
+                break
+            counts.update(posting)
+            budget -= len(posting)
+
+        # Most shared trigrams counted relative to the name's size first,
+        # since that is what the similarity grows with
+        size = len(query)
+        promising = heapq.nlargest(
+            MAX_SCORED, counts,
+            key=lambda i: counts[i] / (size + self.sizes[i])
+        )
+        scores = {}
+        for i in promising:
+            shared = len(query & trigrams(self.names[i]))
+            similarity = 2 * shared / (len(query) + self.sizes[i])
+            if similarity >= MIN_SIMILARITY:
+                scores[i] = similarity
+        best = sorted(scores, key=scores.get, reverse=True)[:limit]
+        return self._candidates(best, scores.get)[:limit]
+
+    def search(self, name, limit=10):
+        """
+        Returns up to limit ranked candidates for name: exact matches,
+        then names starting with it, then similarly spelled names. A
+        blank name has no candidates.
+        """
+        if not name.strip():
+            return []
+        seen = set()
+        results = []
+        for candidates in (self.exact(name),
+                           self.complete(name, limit),
+                           self.fuzzy(name, limit)):
+            for candidate in candidates:
+                if candidate["id"] not in seen:
+                    seen.add(candidate["id"])
+                    results.append(candidate)
+        return results[:limit]
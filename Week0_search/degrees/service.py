@@ -0,0 +1,170 @@
+"""
+Batch and server front ends for degrees.py.
+
+Both keep the loaded data in memory and answer many queries with the
+answer(source_name, target_name) function they are given, which returns
+a JSON-serialisable dict (see degrees.answer).
+"""
+import contextlib
+import json
+import multiprocessing
+import os
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+@contextlib.contextmanager
+def open_text(filename, mode):
+    """
+    Opens filename as a UTF-8 text file, where "-" means stdin or stdout.
+    """
+    if filename == "-":
+        yield sys.stdin if "r" in mode else sys.stdout
+    else:
+        with open(filename, mode, encoding="utf-8") as f:
+            yield f
+
+
+def read_pairs(lines):
+    """
+    Yields (source_name, target_name) pairs from tab-separated lines.
+
+    Blank lines and lines starting with "#" are skipped; a line that is
+    not a pair yields (line, None) so the caller can report it.
+    """
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if not line.strip() or line.startswith("#"):
+            continue
+        fields = line.split("\t")
+        if len(fields) != 2:
+            yield line, None
+        else:
+            yield fields[0].strip(), fields[1].strip()
+
+
+def solve_many(function, pairs, processes=None, chunksize=256):
+    """
+    Yields function(*pair) for every pair, in input order, computed by a
+    pool of worker processes.
+
+    The workers are forked after the data has been loaded, so they share
+    the parent's graph (copy-on-write) instead of each loading the CSV
+    files again. Where fork is not available, or with processes=1, the
+    pairs are solved in this process.
+    """
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if processes <= 1 or "fork" not in multiprocessing.get_all_start_methods():
+        for pair in pairs:
+            yield function(*pair)
+        return
+
+    context = multiprocessing.get_context("fork")
+    with context.Pool(processes) as pool:
+        yield from pool.imap(
+            _Star(function), pairs, chunksize=chunksize
+        )
+
+
+class _Star():
+    """
+    Picklable wrapper that calls function with the items of a pair.
+    """
+
+    def __init__(self, function):
+        self.function = function
+
+    def __call__(self, pair):
+        return self.function(*pair)
+
+
+def run_batch(infile, outfile, answer, processes=1):
+    """
+    Answers every pair in infile and writes one JSON line per pair to
+    outfile, in input order.
+
+    With processes other than 1, the pairs are answered in parallel by
+    solve_many.
+    """
+    results = solve_many(
+        _answer_pair, ((answer, pair) for pair in read_pairs(infile)),
+        processes=processes
+    )
+    for result in results:
+        outfile.write(json.dumps(result) + "\n")
+    outfile.flush()
+
+
+def _answer_pair(answer, pair):
+    """
+    Answers one pair read by read_pairs.
+    """
+    source_name, target_name = pair
+    if target_name is None:
+        return {"line": source_name,
+                "error": "expected two tab-separated names"}
+    return answer(source_name, target_name)
+
+
+def serve(host, port, answer, candidates=None):
+    """
+    Answers GET /path?source=NAME&target=NAME requests with JSON until
+    interrupted.
+
+    If candidates(name, limit) is given, GET /names?name=TEXT[&limit=N]
+    returns its ranked matches, for autocompletion.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+
+        # Keep connections open, so clients can send many queries on one
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+            if url.path == "/names" and candidates is not None:
+                self.send_names(query)
+            elif url.path != "/path":
+                self.send_json(404, {"error": "not found"})
+            elif "source" not in query or "target" not in query:
+                self.send_json(
+                    400, {"error": "source and target are required"}
+                )
+            else:
+                result = answer(query["source"][0], query["target"][0])
+                self.send_json(200, result)
+
+        def send_names(self, query):
+            if "name" not in query:
+                self.send_json(400, {"error": "name is required"})
+                return
+            try:
+                limit = int(query.get("limit", ["10"])[0])
+            except ValueError:
+                self.send_json(400, {"error": "limit must be a number"})
+                return
+            self.send_json(200, candidates(query["name"][0], limit))
+
+        def send_json(self, status, result):
+            body = json.dumps(result).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            # Logging every request to stderr would dominate the cost of
+            # answering it
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,80 @@
+"""
+Binary snapshots of loaded data, so the CSV files only need to be parsed
+once.
+
+A snapshot is a pickle file holding a header and the data. The header
+records the snapshot format version and the modification time and size
+of every CSV file the data was built from; if any of those changed, the
+snapshot is stale and load returns None so the caller rebuilds it.
+
+Snapshots only hold built-in types and NumPy arrays, never instances of
+this project's classes, so changing a class cannot make an old snapshot
+fail to unpickle.
+"""
+import os
+import pickle
+
+# Bump whenever the layout of the pickled data changes
+SNAPSHOT_VERSION = 3
+
+MAGIC = "degrees-snapshot"
+
+SOURCE_FILES = ("people.csv", "movies.csv", "stars.csv")
+
+
+def source_key(directory):
+    """
+    Returns the (filename, mtime, size) of each CSV file in directory.
+    """
+    key = []
+    for filename in SOURCE_FILES:
+        stat = os.stat(os.path.join(directory, filename))
+        key.append((filename, stat.st_mtime_ns, stat.st_size))
+    return tuple(key)
+
+
+def snapshot_path(directory, kind):
+    """
+    Returns where the snapshot of the given kind for directory is stored.
+    """
+    return os.path.join(directory, f".{kind}.snapshot")
+
+
+def load(path, key):
+    """
+    Returns the data stored at path, or None if there is no snapshot,
+    it is unreadable, or it was built from other files than key.
+
+    Any error while unpickling (not only a corrupt file, but also e.g. a
+    snapshot written by an incompatible version) means it is rebuilt.
+    """
+    try:
+        with open(path, "rb") as f:
+            header = pickle.load(f)
+            if header != (MAGIC, SNAPSHOT_VERSION, key):
+                return None
+            return pickle.load(f)
+    except Exception:
+        return None
+
+
+def save(path, key, data):
+    """
+    Writes data with its header to path.
+
+    The snapshot is written to a temporary file first and then moved in
+    place, so readers never see a half-written snapshot. A directory we
+    cannot write to just means there is no snapshot.
+    """
+    temporary = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary, "wb") as f:
+            pickle.dump((MAGIC, SNAPSHOT_VERSION, key), f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, path)
+    except OSError:
+        try:
+            os.remove(temporary)
+        except OSError:
+            pass
@@ -0,0 +1,186 @@
+"""
+Tic Tac Toe engine on bitboards.
+
+A position is two 9-bit integers, one per player, where bit 3 * i + j is
+set if that player has a mark on cell (i, j). Making a move is setting a
+bit, and a player has won if one of the 8 winning lines is contained in
+their mask, which is looked up in a table of all 512 masks.
+
+The functions initial_state, player, actions, result, winner, terminal,
+utility and minimax take and return list-of-lists boards, exactly like the
+functions of the same name in tictactoe.py (so runner.py can use either
+module); only the search runs on bitboards.
+"""
+import functools
+
+from tictactoe import X, O, EMPTY, initial_state
+
+FULL = 0b111111111
+
+# Rows, columns and diagonals as masks
+WIN_MASKS = (
+    0b000000111, 0b000111000, 0b111000000,
+    0b001001001, 0b010010010, 0b100100100,
+    0b100010001, 0b001010100
+)
+
+# WINNING[mask] is True if the marks in mask contain a winning line
+WINNING = tuple(
+    any(mask & line == line for line in WIN_MASKS) for mask in range(FULL + 1)
+)
+
+# Single-bit masks of the cells, and the cell of every single-bit mask
+BITS = tuple(1 << cell for cell in range(9))
+CELL = {bit: cell for cell, bit in enumerate(BITS)}
+
+
+def encode(board):
+    """
+    Returns (x, o): the masks of the cells held by X and by O.
+    """
+    x = o = 0
+    for i in range(3):
+        for j in range(3):
+            if board[i][j] == X:
+                x |= BITS[3 * i + j]
+            elif board[i][j] == O:
+                o |= BITS[3 * i + j]
+    return x, o
+
+
+def decode(x, o):
+    """
+    Returns the list-of-lists board with X on mask x and O on mask o.
+    """
+    return [[X if x & BITS[3 * i + j] else O if o & BITS[3 * i + j] else EMPTY
+             for j in range(3)]
+            for i in range(3)]
+
+
+def _x_to_move(x, o):
+    return bin(x).count("1") == bin(o).count("1")
+
+
+def player(board):
+    """
+    Returns player who has the next turn on a board.
+    """
+    return X if _x_to_move(*encode(board)) else O
+
+
+def actions(board):
+    """
+    Returns set of all possible actions (i, j) available on the board.
+    """
+    x, o = encode(board)
+    free = FULL & ~(x | o)
+    return [divmod(cell, 3) for cell in range(9) if free & BITS[cell]]
+
+
+def result(board, action):
+    """
+    Returns the board that results from making move (i, j) on the board.
+    """
+    x, o = encode(board)
+    i, j = action
+    bit = BITS[3 * i + j]
+    if (x | o) & bit:
+        raise RuntimeError('Invalid action')
+    if _x_to_move(x, o):
+        x |= bit
+    else:
+        o |= bit
+    return decode(x, o)
+
+
+def _winner(x, o):
+    if WINNING[x]:
+        return X
+    if WINNING[o]:
+        return O
+    return None
+
+
+def winner(board):
+    """
+    Returns the winner of the game, if there is one.
+    """
+    return _winner(*encode(board))
+
+
+def terminal(board):
+    """
+    Returns True if game is over, False otherwise.
+    """
+    x, o = encode(board)
+    return WINNING[x] or WINNING[o] or (x | o) == FULL
+
+
+def utility(board):
+    """
+    Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+    """
+    outcome = winner(board)
+    if outcome == X:
+        return 1
+    if outcome == O:
+        return -1
+    return 0
+
+
+@functools.lru_cache(maxsize=None)
+def value(own, other):
+    """
+    Returns the game value for the player to move, who holds the cells in
+    own, against the opponent holding other: 1 win, 0 draw, -1 loss.
+
+    Cached, so every one of the 5,478 legal positions is solved once.
+    """
+    if WINNING[other]:
+        return -1
+    free = FULL & ~(own | other)
+    if not free:
+        return 0
+    best = -1
+    while free:
+        bit = free & -free
+        free ^= bit
+        score = -value(other, own | bit)
+        if score > best:
+            best = score
+            if best == 1:
+                break
+    return best
+
+
+def best_move(own, other):
+    """
+    Returns the bit of an optimal move for the player to move, or None if
+    the game is over.
+    """
+    if WINNING[own] or WINNING[other]:
+        return None
+    free = FULL & ~(own | other)
+    best = None
+    best_score = -2
+    while free:
+        bit = free & -free
+        free ^= bit
+        score = -value(other, own | bit)
+        if score > best_score:
+            best, best_score = bit, score
+    return best
+
+
+def minimax(board):
+    """
+    Returns the optimal action for the current player on the board.
+    """
+    x, o = encode(board)
+    if _x_to_move(x, o):
+        move = best_move(x, o)
+    else:
+        move = best_move(o, x)
+    if move is None:
+        return None
+    return divmod(CELL[move], 3)
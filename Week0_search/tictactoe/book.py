@@ -0,0 +1,60 @@
+"""
+Builds the opening book for tictactoe.minimax.
+
+Solves every position that can be reached from the empty board (5,478
+positions, 4,520 of which are not over) once with the minimax search,
+and writes the optimal moves to tictactoe.BOOK_FILE: one byte for each of
+the 3^9 boards, indexed by tictactoe.book_index. After that, minimax is
+a lookup in this table.
+
+Run via:
+python3 book.py
+"""
+import time
+
+import tictactoe as ttt
+
+
+def reachable_positions():
+    """
+    Yields every board that can be reached from the empty board.
+    """
+    seen = set()
+    stack = [ttt.initial_state()]
+    while stack:
+        board = stack.pop()
+        index = ttt.book_index(board)
+        if index in seen:
+            continue
+        seen.add(index)
+        yield board
+        if not ttt.terminal(board):
+            for action in ttt.actions(board):
+                stack.append(ttt.result(board, action))
+
+
+def build():
+    """
+    Returns the opening book as bytes.
+    """
+    book = bytearray([ttt.NO_MOVE]) * ttt.BOOK_SIZE
+    for board in reachable_positions():
+        action = ttt.minimax(board, use_book=False)
+        if action is not None:
+            i, j = action
+            book[ttt.book_index(board)] = 3 * i + j
+    return bytes(book)
+
+
+def main():
+    start = time.perf_counter()
+    book = build()
+    with open(ttt.BOOK_FILE, "wb") as f:
+        f.write(book)
+    moves = sum(move != ttt.NO_MOVE for move in book)
+    print(f"Wrote {moves} positions to {ttt.BOOK_FILE} "
+          f"in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,355 @@
+"""
+m,n,k-game engine: Tic Tac Toe generalized to an m x n board, where the
+first player to get k marks in a row (horizontally, vertically or
+diagonally) wins. Tic Tac Toe is the 3,3,3-game.
+
+Larger boards such as 4x4 or 5x5 with k=4 cannot be searched to the end
+in reasonable time, so the search is a depth-limited alpha-beta negamax
+with:
+
+- iterative deepening: depth 1, 2, 3, ... until the time budget runs
+  out, always keeping the best move of the last completed depth;
+- a transposition table keyed by a Zobrist hash of the position;
+- move ordering: the table's best move first, then killer moves (moves
+  that caused a cutoff at the same depth elsewhere in the tree), then
+  the rest by history score (how often they caused cutoffs before);
+- a heuristic evaluation at the depth limit, which scores every line of
+  k cells that only one player has marks in.
+
+minimax(board) takes the same list-of-lists boards as tictactoe.py, of
+any size.
+"""
+import random
+import time
+
+# Marks, as in tictactoe.py
+X = "X"
+O = "O"
+EMPTY = None
+
+# Score of a win; wins found sooner score higher
+WIN = 1000000
+
+# Scores above this are wins, below minus this are losses
+WIN_THRESHOLD = WIN - 1000
+
+# Depth stored in the transposition table for positions that were searched
+# to the end of the game, whose value does not depend on the depth
+SOLVED = 1000
+
+# Kinds of value stored in the transposition table
+EXACT = "exact"
+LOWER = "lower"
+UPPER = "upper"
+
+# Default thinking time of minimax, in seconds
+TIME_LIMIT = 1.0
+
+
+class Timeout(Exception):
+    """
+    Raised inside the search when the time budget has run out.
+    """
+
+
+class Game():
+    """
+    Search state for one position of an m,n,k-game.
+
+    Cells are numbered row by row (cell = i * columns + j) and hold 0 for
+    empty, 1 for X and 2 for O.
+    """
+
+    def __init__(self, board, k=None, stats=None):
+        self.rows = len(board)
+        self.columns = len(board[0])
+        self.k = k if k is not None else default_k(self.rows, self.columns)
+        self.size = self.rows * self.columns
+        codes = {EMPTY: 0, X: 1, O: 2}
+        self.cells = [codes[cell] for row in board for cell in row]
+        self.empty = self.cells.count(0)
+        xs = self.cells.count(1)
+        os = self.cells.count(2)
+        self.to_move = 1 if xs == os else 2
+
+        self.lines = self._lines()
+        self.lines_through = [[] for _ in range(self.size)]
+        for line in self.lines:
+            for cell in line:
+                self.lines_through[cell].append(line)
+
+        # Zobrist hashing: one random number per (cell, player), xor-ed
+        # together for all marks on the board
+        rng = random.Random(self.size * 31 + self.k)
+        self.zobrist = [[0, rng.getrandbits(64), rng.getrandbits(64)]
+                        for _ in range(self.size)]
+        self.hash = 0
+        for cell, mark in enumerate(self.cells):
+            if mark:
+                self.hash ^= self.zobrist[cell][mark]
+
+        # Cells closer to the center take part in more lines
+        self.centrality = [len(lines) for lines in self.lines_through]
+
+        # Weight of a line holding n marks of only one player
+        self.weights = [0] + [10 ** n for n in range(self.k)]
+
+        # Optional tictactoe.SearchStats collecting the work done
+        self.stats = stats
+
+        self.table = {}
+        self.killers = {}
+        self.history = [0] * self.size
+        self.nodes = 0
+        self.deadline = None
+        self.depth_limited = False
+
+    def _lines(self):
+        """
+        Returns every run of k cells in a row, column or diagonal.
+        """
+        lines = []
+        for i in range(self.rows):
+            for j in range(self.columns):
+                for di, dj in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                    end_i = i + di * (self.k - 1)
+                    end_j = j + dj * (self.k - 1)
+                    if 0 <= end_i < self.rows and 0 <= end_j < self.columns:
+                        lines.append(tuple(
+                            (i + di * n) * self.columns + j + dj * n
+                            for n in range(self.k)
+                        ))
+        return lines
+
+    def winner(self):
+        """
+        Returns 1 or 2 if that player has k in a row, None otherwise.
+        """
+        for line in self.lines:
+            mark = self.cells[line[0]]
+            if mark and all(self.cells[cell] == mark for cell in line):
+                return mark
+        return None
+
+    def wins(self, cell):
+        """
+        Returns True if the mark on cell completes a line.
+        """
+        mark = self.cells[cell]
+        return any(
+            all(self.cells[other] == mark for other in line)
+            for line in self.lines_through[cell]
+        )
+
+    def play(self, cell):
+        self.cells[cell] = self.to_move
+        self.hash ^= self.zobrist[cell][self.to_move]
+        self.to_move = 3 - self.to_move
+        self.empty -= 1
+
+    def undo(self, cell):
+        self.to_move = 3 - self.to_move
+        self.hash ^= self.zobrist[cell][self.to_move]
+        self.cells[cell] = 0
+        self.empty += 1
+
+    def evaluate(self):
+        """
+        Heuristic value of the position for the player to move: lines
+        only they have marks in count for them, lines only the opponent
+        has marks in count against them.
+        """
+        me = self.to_move
+        score = 0
+        for line in self.lines:
+            mine = theirs = 0
+            for cell in line:
+                mark = self.cells[cell]
+                if mark == me:
+                    mine += 1
+                elif mark:
+                    theirs += 1
+            if not theirs:
+                score += self.weights[mine]
+            elif not mine:
+                score -= self.weights[theirs]
+        return score
+
+    def ordered_moves(self, ply, best):
+        """
+        Returns the empty cells, best move of the transposition table
+        first, then killer moves, then by history and centrality.
+        """
+        moves = [cell for cell in range(self.size) if not self.cells[cell]]
+        moves.sort(
+            key=lambda cell: (self.history[cell], self.centrality[cell]),
+            reverse=True
+        )
+        first = [best] if best is not None else []
+        first += [cell for cell in self.killers.get(ply, ())
+                  if cell != best]
+        first = [cell for cell in first if cell in moves]
+        return first + [cell for cell in moves if cell not in first]
+
+    def search(self, depth, ply, alpha, beta):
+        """
+        Returns the negamax value of the position for the player to move,
+        searching depth more moves.
+        """
+        self.nodes += 1
+        if (self.nodes & 1023) == 0 and time.perf_counter() > self.deadline:
+            raise Timeout()
+        if self.stats is not None:
+            self.stats.visit(ply)
+
+        window = (alpha, beta)
+        entry = self.table.get(self.hash)
+        best_move = None
+        if entry is not None:
+            entry_depth, value, kind, best_move = entry
+            value = _from_table(value, ply)
+            if entry_depth >= depth:
+                if kind == EXACT or (kind == LOWER and value >= beta) or (
+                        kind == UPPER and value <= alpha):
+                    if entry_depth < SOLVED:
+                        self.depth_limited = True
+                    if self.stats is not None:
+                        self.stats.cache_hits += 1
+                    return value
+
+        if self.empty == 0:
+            return 0
+        if depth == 0:
+            self.depth_limited = True
+            return self.evaluate()
+
+        # Track whether this subtree hits the depth limit anywhere; if
+        # not, its value is exact at any depth
+        limited_above = self.depth_limited
+        self.depth_limited = False
+
+        best = -WIN - 1
+        for cell in self.ordered_moves(ply, best_move):
+            self.play(cell)
+            try:
+                if self.wins(cell):
+                    score = WIN - ply - 1
+                elif self.empty == 0:
+                    score = 0
+                else:
+                    score = -self.search(depth - 1, ply + 1, -beta, -alpha)
+            finally:
+                # Also when a Timeout unwinds the search, so the game is
+                # left in the position it was searched from
+                self.undo(cell)
+
+            if score > best:
+                best = score
+                best_move = cell
+            if best > alpha:
+                alpha = best
+            if alpha >= beta:
+                if self.stats is not None:
+                    # X maximizes, so its cutoffs are beta cutoffs
+                    if self.to_move == 1:
+                        self.stats.beta_cutoffs += 1
+                    else:
+                        self.stats.alpha_cutoffs += 1
+                killers = self.killers.setdefault(ply, [])
+                if cell not in killers:
+                    killers.insert(0, cell)
+                    del killers[2:]
+                self.history[cell] += depth * depth
+                break
+
+        if best <= window[0]:
+            kind = UPPER
+        elif best >= window[1]:
+            kind = LOWER
+        else:
+            kind = EXACT
+        stored_depth = depth if self.depth_limited else SOLVED
+        self.table[self.hash] = (
+            stored_depth, _to_table(best, ply), kind, best_move
+        )
+        self.depth_limited = self.depth_limited or limited_above
+        return best
+
+    def best_move(self, time_limit=TIME_LIMIT, max_depth=None):
+        """
+        Returns (cell, value) of the best move found by iterative deepening
+        within time_limit seconds, or (None, value) if the game is over.
+
+        The search stops early once a depth is searched completely without
+        reaching the depth limit anywhere, or a forced win or loss is
+        found, since deeper searches cannot change the result then.
+        """
+        winner = self.winner()
+        if winner is not None:
+            return None, WIN if winner == self.to_move else -WIN
+        if self.empty == 0:
+            return None, 0
+
+        start = time.perf_counter()
+        if max_depth is None:
+            max_depth = self.empty
+        best, value = None, 0
+        for depth in range(1, max_depth + 1):
+            # The first depth is always completed, so there is a move
+            if best is not None:
+                self.deadline = start + time_limit
+            else:
+                self.deadline = float("inf")
+            self.depth_limited = False
+            try:
+                value = self.search(depth, 0, -WIN - 1, WIN + 1)
+            except Timeout:
+                break
+            best = self.table[self.hash][3]
+            if not self.depth_limited or abs(value) > WIN_THRESHOLD:
+                break
+        return best, value
+
+
+def _to_table(value, ply):
+    """
+    Win and loss scores depend on the distance from the root; store them
+    relative to the node instead, so they can be reused at another ply.
+    """
+    if value > WIN_THRESHOLD:
+        return value + ply
+    if value < -WIN_THRESHOLD:
+        return value - ply
+    return value
+
+
+def _from_table(value, ply):
+    if value > WIN_THRESHOLD:
+        return value - ply
+    if value < -WIN_THRESHOLD:
+        return value + ply
+    return value
+
+
+def default_k(rows, columns):
+    """
+    Returns the line length needed to win: 3 on 3x3, 4 on larger boards.
+    """
+    return min(rows, columns, 4)
+
+
+def minimax(board, k=None, time_limit=TIME_LIMIT, stats=None):
+    """
+    Returns the optimal action (i, j) for the current player on a board of
+    any size, or None if the game is over. k is the number of marks in a
+    row needed to win (see default_k).
+
+    Small games are searched to the end; on larger boards the best move
+    found within time_limit seconds is returned. If stats (a
+    tictactoe.SearchStats) is given, it collects the work done.
+    """
+    game = Game(board, k, stats)
+    cell, _ = game.best_move(time_limit)
+    if cell is None:
+        return None
+    return divmod(cell, game.columns)
@@ -0,0 +1,181 @@
+"""
+Headless Tic Tac Toe simulator.
+
+Plays many games between two agents in a pool of worker processes,
+without pygame, and reports the results, games per second, positions
+searched per move and move latency percentiles. Games can also be
+written out as JSON lines, e.g. as self-play data.
+
+Agents:
+    random    plays a random legal move
+    minimax   tictactoe.minimax, searching every move from scratch
+    cached    tictactoe.minimax with its transposition table kept between
+              moves and games, and the opening book if it has been built
+    bitboard  bitboard.minimax
+
+Usage: python simulate.py [--games N] [--x AGENT] [--o AGENT] [--processes N]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import time
+
+import bitboard
+import tictactoe as ttt
+
+
+def random_agent(board, rng, stats):
+    return rng.choice(ttt.actions(board))
+
+
+def minimax_agent(board, rng, stats):
+    ttt.clear_table()
+    return ttt.minimax(board, use_book=False, stats=stats)
+
+
+def cached_agent(board, rng, stats):
+    return ttt.minimax(board, stats=stats)
+
+
+def bitboard_agent(board, rng, stats):
+    # bitboard.value is an lru_cache: its misses are the positions
+    # searched, its hits the transposition table hits
+    before = bitboard.value.cache_info()
+    action = bitboard.minimax(board)
+    after = bitboard.value.cache_info()
+    stats.nodes = after.misses - before.misses
+    stats.cache_hits = after.hits - before.hits
+    return action
+
+
+AGENTS = {
+    "random": random_agent,
+    "minimax": minimax_agent,
+    "cached": cached_agent,
+    "bitboard": bitboard_agent
+}
+
+
+def play_game(x_agent, o_agent, seed):
+    """
+    Plays one game; returns its winner (X, O or None for a tie), its
+    moves, and for every move the agent, time in seconds and the
+    tictactoe.SearchStats of the search (all zero for the random agent,
+    and only nodes and cache hits for the bitboard agent).
+    """
+    rng = random.Random(seed)
+    agents = {ttt.X: x_agent, ttt.O: o_agent}
+    board = ttt.initial_state()
+    moves = []
+    while not ttt.terminal(board):
+        player = ttt.player(board)
+        name = agents[player]
+        stats = ttt.SearchStats()
+        start = time.perf_counter()
+        action = AGENTS[name](board, rng, stats)
+        seconds = time.perf_counter() - start
+        move = {
+            "player": player,
+            "agent": name,
+            "action": list(action),
+            "seconds": seconds
+        }
+        move.update((k, v) for k, v in stats.as_dict().items()
+                    if k != "seconds")
+        moves.append(move)
+        board = ttt.result(board, action)
+    return {"winner": ttt.winner(board), "moves": moves}
+
+
+def _play(job):
+    return play_game(*job)
+
+
+def simulate(games, x_agent, o_agent, processes=None, seed=0):
+    """
+    Plays games games in a pool of processes (one per core by default)
+    and returns them in order.
+    """
+    jobs = [(x_agent, o_agent, seed + game) for game in range(games)]
+    if processes == 1:
+        return [_play(job) for job in jobs]
+    with multiprocessing.Pool(processes) as pool:
+        return pool.map(_play, jobs, chunksize=max(1, games // 64))
+
+
+def percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def summarize(results, seconds):
+    """
+    Returns the outcome counts, throughput and per-agent move statistics
+    of a list of games played in seconds.
+    """
+    outcomes = {"X": 0, "O": 0, "tie": 0}
+    for game in results:
+        outcomes[game["winner"] or "tie"] += 1
+
+    agents = {}
+    for player in (ttt.X, ttt.O):
+        moves = [move for game in results for move in game["moves"]
+                 if move["player"] == player]
+        if not moves:
+            continue
+        latencies = sorted(move["seconds"] for move in moves)
+        agents[player] = {
+            "agent": moves[0]["agent"],
+            "moves": len(moves),
+            "nodes_per_move": sum(move["nodes"] for move in moves) / len(moves),
+            "cutoffs_per_move": sum(
+                move["alpha_cutoffs"] + move["beta_cutoffs"] for move in moves
+            ) / len(moves),
+            "cache_hits_per_move": sum(
+                move["cache_hits"] for move in moves
+            ) / len(moves),
+            "latency_ms": {
+                "p50": 1000 * percentile(latencies, 0.5),
+                "p90": 1000 * percentile(latencies, 0.9),
+                "p99": 1000 * percentile(latencies, 0.99),
+                "max": 1000 * latencies[-1]
+            }
+        }
+
+    return {
+        "games": len(results),
+        "seconds": seconds,
+        "games_per_second": len(results) / seconds if seconds else None,
+        "outcomes": outcomes,
+        "players": agents
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Play Tic Tac Toe games between agents without a display."
+    )
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--x", choices=sorted(AGENTS), default="cached")
+    parser.add_argument("--o", choices=sorted(AGENTS), default="random")
+    parser.add_argument("--processes", type=int, default=os.cpu_count(),
+                        help="number of worker processes")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--record", metavar="FILE",
+                        help="also write every game as a JSON line to FILE")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    results = simulate(args.games, args.x, args.o, args.processes, args.seed)
+    seconds = time.perf_counter() - start
+
+    if args.record:
+        with open(args.record, "w", encoding="utf-8") as f:
+            for game in results:
+                f.write(json.dumps(game) + "\n")
+    print(json.dumps(summarize(results, seconds), indent=2))
+
+
+if __name__ == "__main__":
+    main()
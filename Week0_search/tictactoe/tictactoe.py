@@ -3,11 +3,125 @@ Tic Tac Toe Player
 """
 import copy
 import math
+import os
+import time
+from collections import OrderedDict
+
+import mnk
 
 X = "X"
 O = "O"
 EMPTY = None
 
+# Maximum number of positions kept in the transposition table
+TABLE_SIZE = 100000
+
+# Kinds of value stored in the transposition table: the exact minimax
+# value, or only a lower or upper bound on it (after an alpha-beta cutoff)
+EXACT = "exact"
+LOWER = "lower"
+UPPER = "upper"
+
+# Transposition table, shared by all calls to minimax: maps the canonical
+# key of a board (see canonical) to (value, optimal action, kind of value),
+# with the action in the orientation of the canonical board, least
+# recently used first
+table = OrderedDict()
+
+
+def _symmetries():
+    """
+    Returns the 8 rotations and reflections of the board, each as a tuple
+    p of cell indices (3 * i + j) such that cell k of the transformed
+    board is cell p[k] of the original board.
+    """
+    def rotate(i, j):
+        return (j, 2 - i)
+
+    def reflect(i, j):
+        return (i, 2 - j)
+
+    symmetries = []
+    for reflected in (False, True):
+        for rotations in range(4):
+            permutation = []
+            for k in range(9):
+                i, j = divmod(k, 3)
+                if reflected:
+                    i, j = reflect(i, j)
+                for _ in range(rotations):
+                    i, j = rotate(i, j)
+                permutation.append(3 * i + j)
+            symmetries.append(tuple(permutation))
+    return symmetries
+
+
+SYMMETRIES = _symmetries()
+
+# INVERSES[n][p] is the cell of the transformed board that cell p moves to
+INVERSES = [
+    tuple(permutation.index(p) for p in range(9))
+    for permutation in SYMMETRIES
+]
+
+CELL_CODES = {EMPTY: ".", X: "X", O: "O"}
+
+# Opening book built by book.py: one byte per board, indexed by book_index,
+# holding the optimal move as 3 * i + j, or NO_MOVE
+BOOK_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "book.bin")
+BOOK_SIZE = 3 ** 9
+BOOK_CODES = {EMPTY: 0, X: 1, O: 2}
+NO_MOVE = 255
+
+# Contents of BOOK_FILE once loaded, False if it is missing
+_book = None
+
+# SearchStats of the minimax call in progress, if it asked for them
+_stats = None
+
+
+class SearchStats():
+    """
+    Work done by one call to minimax: positions visited, alpha and beta
+    cutoffs, transposition table and opening book hits, the deepest
+    position reached (in moves from the searched board) and the time
+    taken.
+
+    Pass an instance as minimax(board, stats=stats); if it was created
+    with a callback, that is called with the filled-in stats when the
+    call returns.
+    """
+
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.nodes = 0
+        self.alpha_cutoffs = 0
+        self.beta_cutoffs = 0
+        self.cache_hits = 0
+        self.book_hits = 0
+        self.max_depth = 0
+        self.seconds = 0.0
+
+    def visit(self, depth):
+        self.nodes += 1
+        if depth > self.max_depth:
+            self.max_depth = depth
+
+    def as_dict(self):
+        return {
+            "nodes": self.nodes,
+            "alpha_cutoffs": self.alpha_cutoffs,
+            "beta_cutoffs": self.beta_cutoffs,
+            "cache_hits": self.cache_hits,
+            "book_hits": self.book_hits,
+            "max_depth": self.max_depth,
+            "seconds": self.seconds
+        }
+
+    def __repr__(self):
+        fields = ", ".join(f"{k}={v}" for k, v in self.as_dict().items())
+        return f"SearchStats({fields})"
+
 
 def initial_state():
     """
@@ -146,10 +260,45 @@ def utility(board):
        return 0   
 
 
-def minimax(board):
+def minimax(board, use_book=True, stats=None):
     """
     Returns the optimal action for the current player on the board.
+
+    If the opening book (see book.py) has been built, the action is
+    looked up there instead of searched for, unless use_book is False.
+    If stats (a SearchStats) is given, it collects the work done.
     """
+    global _stats
+    if stats is None:
+       return _minimax(board, use_book, None)
+
+    start = time.perf_counter()
+    _stats = stats
+    try:
+       return _minimax(board, use_book, stats)
+    finally:
+       _stats = None
+       stats.seconds = time.perf_counter() - start
+       if stats.callback is not None:
+          stats.callback(stats)
+
+
+def _minimax(board, use_book, stats):
+
+    #Boards other than 3x3 are played by the general m,n,k engine
+    if len(board) != 3 or any(len(row) != 3 for row in board):
+       return mnk.minimax(board, stats=stats)
+
+    #Look the position up in the opening book, if there is one
+    if use_book:
+       book = opening_book()
+       if book is not None:
+          move = book[book_index(board)]
+          if move != NO_MOVE:
+             if stats is not None:
+                stats.book_hits += 1
+             return divmod(move, 3)
+
     if terminal(board):
        return None
     
@@ -162,41 +311,201 @@ def minimax(board):
 
     
        
+def book_index(board):
+    """
+    Returns the board as a base-3 number (EMPTY 0, X 1, O 2 per cell),
+    its index in the opening book.
+    """
+    index = 0
+    for row in reversed(board):
+        for cell in reversed(row):
+            index = 3 * index + BOOK_CODES[cell]
+    return index
+
+
+def opening_book():
+    """
+    Returns the opening book, loading it from BOOK_FILE the first time,
+    or None if it has not been built.
+    """
+    global _book
+    if _book is None:
+        try:
+            with open(BOOK_FILE, "rb") as f:
+                data = f.read()
+        except OSError:
+            data = b""
+        _book = data if len(data) == BOOK_SIZE else False
+    return _book or None
+
+
+def board_key(board):
+    """
+    Returns the board as a string of 9 cells, row by row.
+    """
+    return "".join(CELL_CODES[cell] for row in board for cell in row)
+
+
+def canonical(board):
+    """
+    Returns (key, symmetry): the smallest board_key among the 8 rotations
+    and reflections of the board, and the index in SYMMETRIES of the
+    transformation that gives it. Boards that are rotations or
+    reflections of each other have the same key.
+    """
+    flat = board_key(board)
+    return min(
+        ("".join([flat[p] for p in permutation]), n)
+        for n, permutation in enumerate(SYMMETRIES)
+    )
+
+
+def to_canonical(action, symmetry):
+    """
+    Translates action on the board to the canonical orientation.
+    """
+    return divmod(INVERSES[symmetry][3 * action[0] + action[1]], 3)
+
+
+def from_canonical(action, symmetry):
+    """
+    Translates action in the canonical orientation back to the board.
+    """
+    return divmod(SYMMETRIES[symmetry][3 * action[0] + action[1]], 3)
+
+
+def distinct_actions(board):
+    """
+    Returns the actions of the board, leaving out moves that give the
+    same position as an earlier move up to a rotation or reflection
+    that leaves the board itself unchanged (e.g. only 3 of the 9 first
+    moves are different).
+    """
+    flat = board_key(board)
+    stabilizer = [
+        permutation for permutation in SYMMETRIES[1:]
+        if all(flat[p] == flat[k] for k, p in enumerate(permutation))
+    ]
+    moves = actions(board)
+    if not stabilizer:
+        return moves
+    distinct = []
+    for i, j in moves:
+        cell = 3 * i + j
+        if all(permutation.index(cell) >= cell for permutation in stabilizer):
+            distinct.append((i, j))
+    return distinct
+
+
+def probe(key, symmetry, alpha, beta):
+    """
+    Returns the (value, action) stored for key if it settles the search
+    within the window alpha..beta, None otherwise. The action is
+    translated back to the orientation of the board.
+    """
+    entry = table.get(key)
+    if entry is None:
+        return None
+    table.move_to_end(key)
+    value, action, kind = entry
+    if (kind == EXACT
+            or (kind == LOWER and value >= beta)
+            or (kind == UPPER and value <= alpha)):
+        if action is not None:
+            action = from_canonical(action, symmetry)
+        return (value, action)
+    return None
+
+
+def store(key, symmetry, value, action, alpha, beta):
+    """
+    Stores the result of searching key within the window alpha..beta,
+    evicting the least recently used position if the table is full.
+    """
+    if value <= alpha:
+        kind = UPPER
+    elif value >= beta:
+        kind = LOWER
+    else:
+        kind = EXACT
+    if action is not None:
+        action = to_canonical(action, symmetry)
+    table[key] = (value, action, kind)
+    table.move_to_end(key)
+    if len(table) > TABLE_SIZE:
+        table.popitem(last=False)
+
+
+def clear_table():
+    """
+    Empties the transposition table.
+    """
+    table.clear()
+
+
 #Min and max functions, to be used to find best next action
-def MinValue(board,alpha,beta):
+def MinValue(board,alpha,beta,depth=0):
+
+    if _stats is not None:
+       _stats.visit(depth)
 
     infini=1000000
     v=infini
     
     if terminal(board):
        return(utility(board),None)      
+
+    #Reuse the value of this position if it was searched before
+    key, symmetry = canonical(board)
+    cached = probe(key, symmetry, alpha, beta)
+    if cached is not None:
+       if _stats is not None:
+          _stats.cache_hits += 1
+       return cached
+    window = (alpha, beta)
         
     optaction = None    
-    for act in actions(board):
-        pos_res = MaxValue(result(board,act),alpha,beta)
+    for act in distinct_actions(board):
+        pos_res = MaxValue(result(board,act),alpha,beta,depth+1)
         
         if pos_res[0] < v:
            v = pos_res[0]
            optaction=act
            
         if v <= alpha:
+           if _stats is not None:
+              _stats.alpha_cutoffs += 1
+           store(key, symmetry, v, optaction, *window)
            return(v,optaction)
         if v < beta:
            beta=v
            
+    store(key, symmetry, v, optaction, *window)
     return (v,optaction)
             
-def MaxValue(board,alpha,beta):
+def MaxValue(board,alpha,beta,depth=0):
+
+    if _stats is not None:
+       _stats.visit(depth)
 
     infini=1000000
     v=-infini
     
     if terminal(board):
        return(utility(board),None)
+
+    #Reuse the value of this position if it was searched before
+    key, symmetry = canonical(board)
+    cached = probe(key, symmetry, alpha, beta)
+    if cached is not None:
+       if _stats is not None:
+          _stats.cache_hits += 1
+       return cached
+    window = (alpha, beta)
         
     optaction = None    
-    for act in actions(board):
-        pos_res = MinValue(result(board,act),alpha,beta)
+    for act in distinct_actions(board):
+        pos_res = MinValue(result(board,act),alpha,beta,depth+1)
         
         if pos_res[0] > v:
            v = pos_res[0]
@@ -204,11 +513,15 @@ def MaxValue(board,alpha,beta):
            
         #The next two if statement make this a alpha-beta pruning code
         #Without it it's a minimax code 
-        if v <= alpha:
+        if v >= beta:
+           if _stats is not None:
+              _stats.beta_cutoffs += 1
+           store(key, symmetry, v, optaction, *window)
            return(v,optaction)
-        if v < beta:
-           beta=v  
+        if v > alpha:
+           alpha=v  
            
+    store(key, symmetry, v, optaction, *window)
     return (v,optaction)       
     
 
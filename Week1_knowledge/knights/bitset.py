@@ -0,0 +1,155 @@
+"""
+Truth-table model checking on bitsets.
+
+Instead of evaluating a sentence in one model at a time, the models are
+split into blocks of 2^BLOCK_BITS and every symbol is given as an integer
+holding its value in each model of a block, one bit per model: the first
+BLOCK_BITS symbols alternate within the block (symbol i in runs of 2^i
+bits), the others are all zeros or all ones, depending on the block. Not,
+And and Or then become bitwise operations on these integers
+(Sentence.bits), evaluating the whole block at once.
+
+knowledge entails query if no model has knowledge true and query false,
+i.e. if knowledge & ~query is 0 in every block. Blocks are ints of 65,536
+bits rather than 64-bit machine words, since Python evaluates one
+operation on a large int much faster than many operations on small ones.
+With many blocks, they are checked in chunks by a pool of processes.
+"""
+import multiprocessing
+import os
+
+# Log2 of the number of models in a block
+BLOCK_BITS = 16
+
+# From this many blocks (28 symbols) on, they are checked in parallel:
+# starting a pool takes about as long as checking 2,000 blocks serially
+PARALLEL_BLOCKS = 4096
+
+# Number of blocks per task of a worker process
+CHUNK_BLOCKS = 32
+
+
+def block_patterns(count):
+    """
+    Returns the bit patterns of the first count symbols over a block of
+    2^count models.
+    """
+    size = 1 << count
+    patterns = []
+    for i in range(count):
+        # 2^i zeros, then 2^i ones, repeated over the block
+        run = 1 << i
+        pattern = ((1 << run) - 1) << run
+        width = 2 * run
+        while width < size:
+            pattern |= pattern << width
+            width *= 2
+        patterns.append(pattern)
+    return patterns
+
+
+def block_inputs(names):
+    """
+    Returns (patterns, high, mask) for the models of the symbols in names:
+    the patterns of every symbol (select sets those of the symbols in high
+    for a given block) and the mask of all models of a block.
+    """
+    low = min(len(names), BLOCK_BITS)
+    mask = (1 << (1 << low)) - 1
+    patterns = dict(zip(names, block_patterns(low)))
+    return patterns, names[low:], mask
+
+
+def select(patterns, high, mask, block):
+    """
+    Sets the patterns of the symbols in high, which are constant within a
+    block, for block number block.
+    """
+    for j, name in enumerate(high):
+        patterns[name] = mask if (block >> j) & 1 else 0
+
+
+def num_blocks(names):
+    return 1 << max(0, len(names) - BLOCK_BITS)
+
+
+def check_blocks(knowledge, query, names, first, last):
+    """
+    Returns True if knowledge entails query in blocks first to last - 1 of
+    the models of the symbols in names.
+    """
+    patterns, high, mask = block_inputs(names)
+    for block in range(first, last):
+        select(patterns, high, mask, block)
+        models = knowledge.bits(patterns, mask)
+        if models and models & ~query.bits(patterns, mask):
+            return False
+    return True
+
+
+def satisfying_models(knowledge, names):
+    """
+    Returns the models of knowledge, as a dict from block number to the
+    bitset of models in that block, for the blocks that have any.
+    """
+    patterns, high, mask = block_inputs(names)
+    result = {}
+    for block in range(num_blocks(names)):
+        select(patterns, high, mask, block)
+        models = knowledge.bits(patterns, mask)
+        if models:
+            result[block] = models
+    return result
+
+
+def restrict(models, sentence, names):
+    """
+    Returns the models (as from satisfying_models) in which sentence is
+    also true.
+    """
+    patterns, high, mask = block_inputs(names)
+    result = {}
+    for block, bits in models.items():
+        select(patterns, high, mask, block)
+        bits &= sentence.bits(patterns, mask)
+        if bits:
+            result[block] = bits
+    return result
+
+
+def true_in_all(models, query, names):
+    """
+    Returns True if query is true in all the models (as from
+    satisfying_models).
+    """
+    patterns, high, mask = block_inputs(names)
+    for block, bits in models.items():
+        select(patterns, high, mask, block)
+        if bits & ~query.bits(patterns, mask):
+            return False
+    return True
+
+
+def _check_chunk(job):
+    return check_blocks(*job)
+
+
+def entails(knowledge, query, processes=None):
+    """
+    Checks if knowledge base entails query by evaluating the whole truth
+    table, using a pool of processes (one per core by default) if it has
+    at least PARALLEL_BLOCKS blocks and there is more than one core.
+    """
+    names = sorted(set.union(knowledge.symbols(), query.symbols()))
+    blocks = num_blocks(names)
+    if (blocks < PARALLEL_BLOCKS
+            or (processes or os.cpu_count() or 1) == 1):
+        return check_blocks(knowledge, query, names, 0, blocks)
+
+    jobs = [(knowledge, query, names, first, min(first + CHUNK_BLOCKS, blocks))
+            for first in range(0, blocks, CHUNK_BLOCKS)]
+    with multiprocessing.Pool(processes) as pool:
+        for entailed in pool.imap_unordered(_check_chunk, jobs):
+            if not entailed:
+                return False
+    return True
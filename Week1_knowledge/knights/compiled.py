@@ -0,0 +1,218 @@
+"""
+Sentences compiled to flat programs.
+
+Sentence.evaluate walks the tree of Python objects recursively and looks
+every symbol up in the model dict by name. compile_sentence turns a
+sentence into a Program instead: a flat list of instructions in which
+symbols are integer indices and operands are the results of earlier
+instructions, so evaluating it is a single loop. Subsentences that are
+the same object are compiled once.
+
+A Program can be run on one model, or on a NumPy boolean matrix holding
+many models (one row per model, one column per symbol) at once, in
+which case every instruction is a single array operation over all rows.
+model_check uses the latter to check the whole truth table in batches.
+For single models, the program is also turned into one Python expression
+(compiled by Python to bytecode), which short-circuits like the tree.
+"""
+import numpy as np
+
+from logic import Symbol, Not, And, Or, Implication, Biconditional
+
+# Instructions are (opcode, operand), where operand is a symbol index for
+# SYMBOL, an instruction index for NOT and a tuple of instruction indices
+# for the others
+SYMBOL = 0
+NOT = 1
+AND = 2
+OR = 3
+IMPLIES = 4
+IFF = 5
+
+# Number of models model_check evaluates at once
+BATCH_SIZE = 1 << 16
+
+# Longest expression Program compiles to a Python function; longer
+# programs (e.g. with much sharing) are run by the instruction loop
+MAX_EXPRESSION = 100000
+
+
+class Program():
+    """
+    A compiled sentence; its value is the result of the last instruction.
+    """
+
+    def __init__(self, symbols, code):
+        self.symbols = symbols
+        self.code = code
+        self.function = _to_function(code)
+
+    def __len__(self):
+        return len(self.code)
+
+    def evaluate(self, model):
+        """
+        Evaluates the sentence in a model (symbol name: truth value), like
+        Sentence.evaluate.
+        """
+        try:
+            values = [bool(model[name]) for name in self.symbols]
+        except KeyError as e:
+            raise Exception(f"variable {e.args[0]} not in model")
+        if self.function is not None:
+            return self.function(values)
+        return self.run(values)
+
+    def run(self, values):
+        """
+        Evaluates the sentence given the truth value of every symbol, in
+        the order of self.symbols.
+        """
+        results = []
+        for op, operand in self.code:
+            if op == SYMBOL:
+                value = values[operand]
+            elif op == NOT:
+                value = not results[operand]
+            elif op == AND:
+                value = True
+                for i in operand:
+                    if not results[i]:
+                        value = False
+                        break
+            elif op == OR:
+                value = False
+                for i in operand:
+                    if results[i]:
+                        value = True
+                        break
+            elif op == IMPLIES:
+                value = not results[operand[0]] or results[operand[1]]
+            else:
+                value = results[operand[0]] == results[operand[1]]
+            results.append(value)
+        return results[-1]
+
+    def evaluate_batch(self, models):
+        """
+        Evaluates the sentence in every row of models, a boolean matrix
+        with one column per symbol; returns a boolean array.
+        """
+        models = np.asarray(models, dtype=bool)
+        results = []
+        for op, operand in self.code:
+            if op == SYMBOL:
+                value = models[:, operand]
+            elif op == NOT:
+                value = ~results[operand]
+            elif op == AND or op == OR:
+                if not operand:
+                    value = np.full(len(models), op == AND)
+                else:
+                    value = results[operand[0]].copy()
+                    for i in operand[1:]:
+                        if op == AND:
+                            value &= results[i]
+                        else:
+                            value |= results[i]
+            elif op == IMPLIES:
+                value = ~results[operand[0]] | results[operand[1]]
+            else:
+                value = results[operand[0]] == results[operand[1]]
+            results.append(value)
+        return results[-1]
+
+
+def _to_function(code):
+    """
+    Returns the program as a Python function of the list of symbol values,
+    or None if its expression would be too long or too deeply nested.
+    """
+    expressions = []
+    for op, operand in code:
+        if op == SYMBOL:
+            expression = f"v[{operand}]"
+        elif op == NOT:
+            expression = f"(not {expressions[operand]})"
+        elif op == AND:
+            expression = "(" + (" and ".join(
+                expressions[i] for i in operand) or "True") + ")"
+        elif op == OR:
+            expression = "(" + (" or ".join(
+                expressions[i] for i in operand) or "False") + ")"
+        elif op == IMPLIES:
+            expression = (f"(not {expressions[operand[0]]} "
+                          f"or {expressions[operand[1]]})")
+        else:
+            expression = (f"({expressions[operand[0]]} "
+                          f"== {expressions[operand[1]]})")
+        if len(expression) > MAX_EXPRESSION:
+            return None
+        expressions.append(expression)
+    try:
+        return eval("lambda v: " + expressions[-1])
+    except (SyntaxError, RecursionError, MemoryError):
+        return None
+
+
+def compile_sentence(sentence, symbols=None):
+    """
+    Compiles sentence to a Program. symbols is the list of symbol names
+    giving their column order; by default the sentence's symbols, sorted.
+    """
+    if symbols is None:
+        symbols = sorted(sentence.symbols())
+    index = {name: i for i, name in enumerate(symbols)}
+    code = []
+    compiled = {}
+
+    def emit(sentence):
+        key = id(sentence)
+        if key in compiled:
+            return compiled[key]
+        if isinstance(sentence, Symbol):
+            instruction = (SYMBOL, index[sentence.name])
+        elif isinstance(sentence, Not):
+            instruction = (NOT, emit(sentence.operand))
+        elif isinstance(sentence, And):
+            instruction = (AND, tuple(emit(c) for c in sentence.conjuncts))
+        elif isinstance(sentence, Or):
+            instruction = (OR, tuple(emit(d) for d in sentence.disjuncts))
+        elif isinstance(sentence, Implication):
+            instruction = (IMPLIES, (emit(sentence.antecedent),
+                                     emit(sentence.consequent)))
+        elif isinstance(sentence, Biconditional):
+            instruction = (IFF, (emit(sentence.left), emit(sentence.right)))
+        else:
+            raise TypeError(f"cannot compile {type(sentence).__name__}")
+        code.append(instruction)
+        compiled[key] = len(code) - 1
+        return compiled[key]
+
+    emit(sentence)
+    return Program(list(symbols), code)
+
+
+def assignments(num_symbols, start, stop):
+    """
+    Returns the models numbered start to stop - 1 as a boolean matrix:
+    in model m, symbol i is true if bit i of m is set.
+    """
+    numbers = np.arange(start, stop, dtype=np.int64)
+    bits = np.arange(num_symbols, dtype=np.int64)
+    return ((numbers[:, None] >> bits) & 1).astype(bool)
+
+
+def model_check(knowledge, query, batch_size=BATCH_SIZE):
+    """
+    Checks if knowledge base entails query, like logic.model_check, by
+    evaluating knowledge => query in all 2^n models, batch_size at a time.
+    """
+    symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+    program = compile_sentence(Implication(knowledge, query), symbols)
+    total = 1 << len(symbols)
+    for start in range(0, total, batch_size):
+        models = assignments(len(symbols), start, min(start + batch_size, total))
+        if not program.evaluate_batch(models).all():
+            return False
+    return True
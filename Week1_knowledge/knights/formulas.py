@@ -0,0 +1,264 @@
+"""
+Reading and writing logic sentences.
+
+parse reads the notation of Sentence.formula back into sentences:
+
+    ¬  not          binds tightest
+    ∧  and
+    ∨  or
+    => implication  (right-associative)
+    <=> biconditional  binds loosest
+
+with parentheses for grouping. Symbol names are everything between these
+tokens, with surrounding spaces stripped, so they may contain spaces
+("A is a Knight"). A chain like "a ∧ b ∧ c" becomes a single And with
+three conjuncts, while "(a ∧ b) ∧ c" keeps its nesting.
+
+dumps and loads convert lists of sentences to and from a compact binary
+format, which loads much faster than rebuilding large knowledge bases in
+Python. Since sentences are interned, identical subsentences are written
+once: the file holds the symbol names, then every distinct sentence as a
+sequence of 32-bit words (opcode, then operands), each referring to
+sentences written before it, then the top-level sentences.
+"""
+import re
+import struct
+import sys
+from array import array
+
+from logic import Sentence, Symbol, Not, And, Or, Implication, Biconditional
+
+TOKENS = re.compile(r"(<=>|=>|[¬∧∨()])")
+
+# Binary format
+MAGIC = b"LGKB"
+VERSION = 1
+HEADER = struct.Struct("<4sHIII")
+
+# Opcodes: SYMBOL name, NOT operand, AND n operands..., OR n operands...,
+# IMPLIES antecedent consequent, IFF left right
+SYMBOL = 0
+NOT = 1
+AND = 2
+OR = 3
+IMPLIES = 4
+IFF = 5
+
+
+class Parser():
+    """
+    Recursive descent parser over the tokens of one formula.
+    """
+
+    def __init__(self, text):
+        self.tokens = []
+        for token in TOKENS.split(text):
+            token = token.strip()
+            if token:
+                self.tokens.append(token)
+        self.position = 0
+
+    def peek(self):
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return None
+
+    def next(self):
+        token = self.peek()
+        if token is None:
+            raise ValueError("unexpected end of formula")
+        self.position += 1
+        return token
+
+    def parse(self):
+        if not self.tokens:
+            return And()
+        sentence = self.biconditional()
+        if self.peek() is not None:
+            raise ValueError(f"unexpected {self.peek()!r} at token "
+                             f"{self.position}")
+        return sentence
+
+    def biconditional(self):
+        sentence = self.implication()
+        while self.peek() == "<=>":
+            self.position += 1
+            sentence = Biconditional(sentence, self.implication())
+        return sentence
+
+    def implication(self):
+        sentence = self.disjunction()
+        if self.peek() == "=>":
+            self.position += 1
+            return Implication(sentence, self.implication())
+        return sentence
+
+    def disjunction(self):
+        disjuncts = [self.conjunction()]
+        while self.peek() == "∨":
+            self.position += 1
+            disjuncts.append(self.conjunction())
+        return disjuncts[0] if len(disjuncts) == 1 else Or(*disjuncts)
+
+    def conjunction(self):
+        conjuncts = [self.negation()]
+        while self.peek() == "∧":
+            self.position += 1
+            conjuncts.append(self.negation())
+        return conjuncts[0] if len(conjuncts) == 1 else And(*conjuncts)
+
+    def negation(self):
+        token = self.next()
+        if token == "¬":
+            return Not(self.negation())
+        if token == "(":
+            sentence = self.biconditional()
+            if self.next() != ")":
+                raise ValueError(f"expected ')' at token {self.position - 1}")
+            return sentence
+        if TOKENS.fullmatch(token):
+            raise ValueError(f"unexpected {token!r} at token "
+                             f"{self.position - 1}")
+        return Symbol(token)
+
+
+def parse(text):
+    """
+    Returns the sentence written as text in Sentence.formula notation.
+    Raises ValueError if text is not a valid formula.
+    """
+    return Parser(text).parse()
+
+
+def dumps(sentences):
+    """
+    Returns the list of sentences in the binary format.
+    """
+    names = {}
+    nodes = {}
+    code = array("I")
+
+    def emit(sentence):
+        # Iteratively, in post-order, so deep sentences do not recurse
+        stack = [(sentence, False)]
+        while stack:
+            node, ready = stack.pop()
+            if id(node) in nodes:
+                continue
+            operands = _operands(node)
+            if not ready:
+                stack.append((node, True))
+                stack.extend((operand, False) for operand in operands
+                             if id(operand) not in nodes)
+                continue
+            if isinstance(node, Symbol):
+                code.extend((SYMBOL, names.setdefault(node.name, len(names))))
+            elif isinstance(node, Not):
+                code.extend((NOT, nodes[id(node.operand)]))
+            elif isinstance(node, (And, Or)):
+                code.extend((AND if isinstance(node, And) else OR,
+                             len(operands)))
+                code.extend(nodes[id(operand)] for operand in operands)
+            else:
+                code.extend((IMPLIES if isinstance(node, Implication)
+                             else IFF,
+                             nodes[id(operands[0])], nodes[id(operands[1])]))
+            nodes[id(node)] = len(nodes)
+
+    roots = array("I")
+    for sentence in sentences:
+        Sentence.validate(sentence)
+        emit(sentence)
+        roots.append(nodes[id(sentence)])
+
+    encoded = [name.encode("utf-8") for name in names]
+    lengths = array("I", [len(name) for name in encoded])
+    if sys.byteorder == "big":
+        for words in (code, roots, lengths):
+            words.byteswap()
+    header = HEADER.pack(MAGIC, VERSION, len(names), len(code), len(roots))
+    return b"".join([header, lengths.tobytes(), code.tobytes(),
+                     roots.tobytes()] + encoded)
+
+
+def _operands(sentence):
+    if isinstance(sentence, Symbol):
+        return ()
+    if isinstance(sentence, Not):
+        return (sentence.operand,)
+    if isinstance(sentence, And):
+        return sentence.conjuncts
+    if isinstance(sentence, Or):
+        return sentence.disjuncts
+    if isinstance(sentence, Implication):
+        return (sentence.antecedent, sentence.consequent)
+    if isinstance(sentence, Biconditional):
+        return (sentence.left, sentence.right)
+    raise TypeError(f"cannot serialize {type(sentence).__name__}")
+
+
+def loads(data):
+    """
+    Returns the list of sentences stored in data by dumps.
+    """
+    magic, version, num_names, code_size, num_roots = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("not a sentence file of this version")
+    offset = HEADER.size
+
+    def words(count):
+        nonlocal offset
+        result = array("I")
+        result.frombytes(data[offset:offset + 4 * count])
+        if sys.byteorder == "big":
+            result.byteswap()
+        offset += 4 * count
+        return result
+
+    lengths = words(num_names)
+    code = words(code_size)
+    roots = words(num_roots)
+    symbols = []
+    for length in lengths:
+        symbols.append(Symbol(data[offset:offset + length].decode("utf-8")))
+        offset += length
+
+    nodes = []
+    i = 0
+    while i < code_size:
+        op = code[i]
+        if op == SYMBOL:
+            nodes.append(symbols[code[i + 1]])
+            i += 2
+        elif op == NOT:
+            nodes.append(Not(nodes[code[i + 1]]))
+            i += 2
+        elif op == AND or op == OR:
+            count = code[i + 1]
+            operands = [nodes[j] for j in code[i + 2:i + 2 + count]]
+            nodes.append(And(*operands) if op == AND else Or(*operands))
+            i += 2 + count
+        elif op == IMPLIES or op == IFF:
+            left, right = nodes[code[i + 1]], nodes[code[i + 2]]
+            nodes.append(Implication(left, right) if op == IMPLIES
+                         else Biconditional(left, right))
+            i += 3
+        else:
+            raise ValueError(f"unknown opcode {op}")
+    return [nodes[root] for root in roots]
+
+
+def dump(sentences, path):
+    """
+    Writes the list of sentences to the file at path.
+    """
+    with open(path, "wb") as f:
+        f.write(dumps(sentences))
+
+
+def load(path):
+    """
+    Returns the list of sentences in the file at path.
+    """
+    with open(path, "rb") as f:
+        return loads(f.read())
@@ -0,0 +1,372 @@
+"""
+Inference by resolution and forward chaining.
+
+Both work on clauses: the knowledge base and the negated query are
+converted to conjunctive normal form, a set of clauses, each a frozenset
+of literals (name, True) for a symbol and (name, False) for its
+negation. knowledge entails query exactly when these clauses cannot all
+be true together.
+
+- resolution: repeatedly resolves two clauses with a complementary
+  literal into a new one, until the empty clause (a contradiction) is
+  derived or nothing new can be. Clauses are indexed by literal, so only
+  clauses that can resolve with a new clause are looked at, and clauses
+  that are subsumed by (contain all literals of) another are dropped.
+- forward_chaining: if every clause is a Horn clause (at most one
+  positive literal, i.e. "p1 ∧ p2 ∧ ... => q"), starts from the facts
+  and fires every rule whose premises are all known, in time linear in
+  the size of the clauses.
+
+entails picks the cheapest strategy that applies; for clauses that are
+not all Horn clauses, that is the SAT solver of sat.py rather than
+resolution, which derives far more clauses than DPLL visits models.
+"""
+import heapq
+import itertools
+
+import sat
+from logic import (Symbol, Not, And, Or, Implication, Biconditional,
+                   model_check)
+
+# Conversions to CNF that could produce more clauses than this give up
+MAX_CLAUSES = 10000
+
+# Resolution gives up after deriving this many clauses
+MAX_RESOLVENTS = 100000
+
+# Up to this many symbols, entails checks the truth table (one bitset
+# block) rather than resolving
+TRUTH_TABLE_LIMIT = 16
+
+
+class TooLarge(Exception):
+    """
+    Raised when a conversion or proof exceeds its size limit.
+    """
+
+
+def clauses(sentence, positive=True, memo=None):
+    """
+    Returns the clauses of the CNF of sentence (of its negation if
+    positive is False), without tautologies or duplicates.
+    """
+    # Every subsentence is converted at most once per polarity, rather
+    # than once per path to it (biconditionals convert both operands
+    # twice, so nested ones would take exponential time)
+    if memo is None:
+        memo = {}
+    key = (id(sentence), positive)
+    if key not in memo:
+        memo[key] = _convert(sentence, positive, memo)
+    return memo[key]
+
+
+def _convert(sentence, positive, memo):
+    if isinstance(sentence, Symbol):
+        return {frozenset([(sentence.name, positive)])}
+    if isinstance(sentence, Not):
+        return clauses(sentence.operand, not positive, memo)
+    if isinstance(sentence, And):
+        parts = [clauses(c, positive, memo) for c in sentence.conjuncts]
+        return _conjoin(parts) if positive else _disjoin(parts)
+    if isinstance(sentence, Or):
+        parts = [clauses(d, positive, memo) for d in sentence.disjuncts]
+        return _disjoin(parts) if positive else _conjoin(parts)
+    if isinstance(sentence, Implication):
+        # a => b is ¬a ∨ b, its negation a ∧ ¬b
+        if positive:
+            return _disjoin([clauses(sentence.antecedent, False, memo),
+                             clauses(sentence.consequent, True, memo)])
+        return _conjoin([clauses(sentence.antecedent, True, memo),
+                         clauses(sentence.consequent, False, memo)])
+    if isinstance(sentence, Biconditional):
+        # a <=> b is (¬a ∨ b) ∧ (a ∨ ¬b), its negation (a ∨ b) ∧ (¬a ∨ ¬b)
+        left, right = sentence.left, sentence.right
+        if positive:
+            return _conjoin([
+                _disjoin([clauses(left, False, memo),
+                          clauses(right, True, memo)]),
+                _disjoin([clauses(left, True, memo),
+                          clauses(right, False, memo)])
+            ])
+        return _conjoin([
+            _disjoin([clauses(left, True, memo), clauses(right, True, memo)]),
+            _disjoin([clauses(left, False, memo), clauses(right, False, memo)])
+        ])
+    raise TypeError(f"cannot convert {type(sentence).__name__}")
+
+
+def clause_bound(sentence, positive=True, memo=None):
+    """
+    Returns an upper bound on the number of clauses that clauses(sentence,
+    positive) returns (capped at MAX_CLAUSES + 1), in time linear in the
+    size of sentence, without converting it.
+    """
+    if memo is None:
+        memo = {}
+    key = (id(sentence), positive)
+    if key in memo:
+        return memo[key]
+
+    def bound(operand, sign):
+        return clause_bound(operand, sign, memo)
+
+    def product(counts):
+        result = 1
+        for count in counts:
+            result = min(result * count, MAX_CLAUSES + 1)
+        return result
+
+    if isinstance(sentence, Symbol):
+        result = 1
+    elif isinstance(sentence, Not):
+        result = bound(sentence.operand, not positive)
+    elif isinstance(sentence, (And, Or)):
+        parts = [bound(operand, positive) for operand in sentence.operands()]
+        if isinstance(sentence, And) == positive:
+            result = sum(parts)
+        else:
+            result = product(parts)
+    elif isinstance(sentence, Implication):
+        antecedent, consequent = sentence.antecedent, sentence.consequent
+        if positive:
+            result = product([bound(antecedent, False),
+                              bound(consequent, True)])
+        else:
+            result = bound(antecedent, True) + bound(consequent, False)
+    elif isinstance(sentence, Biconditional):
+        left, right = sentence.left, sentence.right
+        result = (product([bound(left, not positive), bound(right, True)])
+                  + product([bound(left, positive), bound(right, False)]))
+    else:
+        raise TypeError(f"cannot convert {type(sentence).__name__}")
+    memo[key] = min(result, MAX_CLAUSES + 1)
+    return memo[key]
+
+
+def _conjoin(parts):
+    result = set().union(*parts)
+    if len(result) > MAX_CLAUSES:
+        raise TooLarge("too many clauses")
+    return result
+
+
+def _disjoin(parts):
+    # Distribute "or" over "and": one clause per choice of a clause from
+    # every part
+    result = {frozenset()}
+    for part in parts:
+        if len(result) * len(part) > MAX_CLAUSES:
+            raise TooLarge("too many clauses")
+        combined = set()
+        for clause, other in itertools.product(result, part):
+            # Both are free of tautologies, so only a literal of one with
+            # its complement in the other can make one
+            if len(other) > len(clause):
+                clause, other = other, clause
+            if not any((name, not positive) in clause
+                       for name, positive in other):
+                combined.add(clause | other)
+        result = combined
+    return result
+
+
+def _tautology(clause):
+    return any((name, not positive) in clause for name, positive in clause)
+
+
+def is_horn(clause):
+    return sum(1 for _, positive in clause if positive) <= 1
+
+
+def resolve(clause, other, literal):
+    """
+    Returns the resolvent of clause, which contains literal, and other,
+    which contains its complement, or None if it is a tautology.
+    """
+    name, positive = literal
+    merged = (clause - {literal}) | (other - {(name, not positive)})
+    if _tautology(merged):
+        return None
+    return merged
+
+
+def unsatisfiable(clause_set, limit=MAX_RESOLVENTS):
+    """
+    Returns True if resolution derives the empty clause from clause_set.
+    Raises TooLarge after deriving limit clauses.
+    """
+    counter = itertools.count()
+    queue = [(len(clause), next(counter), clause) for clause in clause_set]
+    heapq.heapify(queue)
+    # Clauses already resolved with each other, indexed by literal
+    processed = set()
+    index = {}
+    derived = 0
+
+    while queue:
+        _, _, clause = heapq.heappop(queue)
+        if not clause:
+            return True
+        if clause in processed or _subsumed(clause, index):
+            continue
+
+        # Drop processed clauses the new clause subsumes
+        for other in _subsuming(clause, index):
+            processed.discard(other)
+            for literal in other:
+                index[literal].discard(other)
+
+        for literal in clause:
+            name, positive = literal
+            for other in list(index.get((name, not positive), ())):
+                resolvent = resolve(clause, other, literal)
+                if resolvent is None:
+                    continue
+                if not resolvent:
+                    return True
+                derived += 1
+                if derived > limit:
+                    raise TooLarge("too many resolvents")
+                heapq.heappush(
+                    queue, (len(resolvent), next(counter), resolvent)
+                )
+
+        processed.add(clause)
+        for literal in clause:
+            index.setdefault(literal, set()).add(clause)
+    return False
+
+
+def _subsumed(clause, index):
+    """
+    Returns True if a processed clause contains only literals of clause.
+    """
+    for literal in clause:
+        for other in index.get(literal, ()):
+            if len(other) <= len(clause) and other <= clause:
+                return True
+    return False
+
+
+def _subsuming(clause, index):
+    """
+    Returns the processed clauses that contain every literal of clause.
+    """
+    candidates = None
+    for literal in clause:
+        containing = index.get(literal, set())
+        candidates = (set(containing) if candidates is None
+                      else candidates & containing)
+        if not candidates:
+            return set()
+    return candidates or set()
+
+
+def horn_satisfiable(clause_set):
+    """
+    Returns True if the Horn clauses in clause_set can all be true, by
+    forward chaining from the facts: a clause with no positive literal
+    whose premises are all inferred is a contradiction.
+    """
+    # Number of premises not yet inferred, per clause
+    count = {}
+    rules = {}
+    agenda = []
+    for clause in clause_set:
+        premises = [name for name, positive in clause if not positive]
+        heads = [name for name, positive in clause if positive]
+        head = heads[0] if heads else None
+        if not premises:
+            if head is None:
+                return False
+            agenda.append(head)
+            continue
+        count[clause] = len(premises)
+        for name in premises:
+            rules.setdefault(name, []).append((clause, head))
+
+    inferred = set()
+    while agenda:
+        name = agenda.pop()
+        if name in inferred:
+            continue
+        inferred.add(name)
+        for clause, head in rules.get(name, ()):
+            count[clause] -= 1
+            if count[clause] == 0:
+                if head is None:
+                    return False
+                agenda.append(head)
+    return True
+
+
+def _clauses(knowledge, query):
+    """
+    Returns the clauses of knowledge ∧ ¬query.
+    """
+    memo = {}
+    return _conjoin([clauses(knowledge, True, memo),
+                     clauses(query, False, memo)])
+
+
+def resolution(knowledge, query):
+    """
+    Checks if knowledge base entails query by resolution.
+    """
+    return unsatisfiable(_clauses(knowledge, query))
+
+
+def forward_chaining(knowledge, query):
+    """
+    Checks if knowledge base entails query by forward chaining. The
+    clauses of knowledge and of ¬query must all be Horn clauses, e.g. a
+    knowledge base of rules "p1 ∧ p2 => q" and facts, and a query that
+    is a symbol or a conjunction of symbols.
+    """
+    clause_set = _clauses(knowledge, query)
+    if not all(is_horn(clause) for clause in clause_set):
+        raise ValueError("not a set of Horn clauses")
+    return not horn_satisfiable(clause_set)
+
+
+def sat_unsatisfiable(clause_set):
+    """
+    Returns True if the clauses in clause_set cannot all be true, by
+    solving them with the DPLL solver of sat.py.
+    """
+    variables = {}
+    numbered = []
+    for clause in clause_set:
+        literals = []
+        for name, positive in clause:
+            variable = variables.setdefault(name, len(variables) + 1)
+            literals.append(variable if positive else -variable)
+        numbered.append(literals)
+    return not sat.Solver(len(variables), numbered).solve()
+
+
+def entails(knowledge, query):
+    """
+    Checks if knowledge base entails query with the cheapest strategy that
+    applies: the truth table for few symbols, forward chaining if all
+    clauses are Horn clauses, otherwise the SAT solver on the clauses, and
+    model_check (which converts with the Tseitin transform instead) if
+    there could be too many clauses (see clause_bound).
+    """
+    # The truth table of few symbols is cheaper than even converting to
+    # CNF, which can take time exponential in the size of the sentences
+    symbols = set.union(knowledge.symbols(), query.symbols())
+    if len(symbols) <= TRUTH_TABLE_LIMIT:
+        return model_check(knowledge, query)
+    memo = {}
+    if (clause_bound(knowledge, True, memo)
+            + clause_bound(query, False, memo) > MAX_CLAUSES):
+        return model_check(knowledge, query)
+    try:
+        clause_set = _clauses(knowledge, query)
+    except TooLarge:
+        return model_check(knowledge, query)
+    if all(is_horn(clause) for clause in clause_set):
+        return not horn_satisfiable(clause_set)
+    return sat_unsatisfiable(clause_set)
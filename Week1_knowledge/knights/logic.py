@@ -1,19 +1,108 @@
 import itertools
+import weakref
+
+# Up to this many symbols, model_check evaluates the whole truth table
+# with bitset.py; above it, the SAT solver in sat.py is faster
+BITSET_LIMIT = 18
+
+
+class Interned(type):
+    """Metaclass that makes structurally equal sentences the same object.
+
+    Creating a sentence first looks it up by its class and the identity
+    of its operands (which are interned themselves, so equal operands are
+    the same object); only if it does not exist yet is a new one made.
+    Instances are held weakly, so unused sentences are still freed.
+
+    Only sentences that can never change are shared. A new And can still
+    grow (And.add), so it is interned only once it becomes an operand of
+    another sentence, which freezes it: from then on add raises.
+    """
+
+    instances = weakref.WeakValueDictionary()
+
+    def __call__(cls, *args):
+        args = tuple(Interned.share(arg) for arg in args)
+        key = cls.intern_key(*args)
+        sentence = Interned.instances.get(key) if key is not None else None
+        if sentence is None:
+            sentence = super().__call__(*args)
+            sentence._key = key
+            sentence._hash = None
+            sentence._symbols = None
+            if key is not None:
+                Interned.instances[key] = sentence
+        return sentence
+
+    @staticmethod
+    def share(sentence):
+        """Returns the interned sentence equal to sentence, interning (and
+        so freezing) sentence first if it is an And that is not yet."""
+        if not isinstance(sentence, Sentence) or sentence._key is not None:
+            return sentence
+        # Its operands were shared when they became its operands
+        key = (type(sentence),) + tuple(id(operand)
+                                        for operand in sentence.operands())
+        shared = Interned.instances.get(key)
+        if shared is None:
+            sentence._key = key
+            Interned.instances[key] = sentence
+            shared = sentence
+        return shared
+
+
+class Sentence(metaclass=Interned):
+
+    # Hash and symbols are computed once: sentences do not change, except
+    # an And that is not an operand of another sentence (And.add resets
+    # them)
+    __slots__ = ("_key", "_hash", "_symbols", "__weakref__")
 
+    @classmethod
+    def intern_key(cls, *args):
+        """Returns the key the sentence is interned under, or None if it
+        must not be shared."""
+        if any(getattr(arg, "_key", None) is None for arg in args):
+            return None
+        return (cls,) + tuple(id(arg) for arg in args)
+
+    def __hash__(self):
+        if self._hash is None:
+            self._hash = hash((type(self).__name__, self.operands()))
+        return self._hash
 
-class Sentence():
+    def __reduce__(self):
+        # Unpickle through the constructor, so the result is interned
+        return (type(self), self.operands())
+
+    def operands(self):
+        """Returns the arguments the sentence was constructed with."""
+        return ()
 
     def evaluate(self, model):
         """Evaluates the logical sentence."""
         raise Exception("nothing to evaluate")
 
+    def bits(self, patterns, mask):
+        """Evaluates the logical sentence in a block of models at once.
+
+        patterns maps every symbol to an integer whose bit m is the
+        symbol's value in model m of the block; mask has a bit set for
+        every model. Returns the integer of the sentence's values.
+        """
+        raise Exception("nothing to evaluate")
+
     def formula(self):
         """Returns string formula representing logical sentence."""
         return ""
 
     def symbols(self):
         """Returns a set of all symbols in the logical sentence."""
-        return set()
+        if self._symbols is None:
+            self._symbols = frozenset().union(
+                *[operand.symbols() for operand in self.operands()]
+            )
+        return set(self._symbols)
 
     @classmethod
     def validate(cls, sentence):
@@ -44,14 +133,24 @@ class Sentence():
 
 class Symbol(Sentence):
 
+    __slots__ = ("name",)
+
+    @classmethod
+    def intern_key(cls, name):
+        return (cls, name)
+
     def __init__(self, name):
         self.name = name
 
     def __eq__(self, other):
-        return isinstance(other, Symbol) and self.name == other.name
+        return self is other or (
+            isinstance(other, Symbol) and self.name == other.name
+        )
 
-    def __hash__(self):
-        return hash(("symbol", self.name))
+    __hash__ = Sentence.__hash__
+
+    def operands(self):
+        return (self.name,)
 
     def __repr__(self):
         return self.name
@@ -62,6 +161,12 @@ class Symbol(Sentence):
         except KeyError:
             raise Exception(f"variable {self.name} not in model")
 
+    def bits(self, patterns, mask):
+        try:
+            return patterns[self.name]
+        except KeyError:
+            raise Exception(f"variable {self.name} not in model")
+
     def formula(self):
         return self.name
 
@@ -70,15 +175,22 @@ class Symbol(Sentence):
 
 
 class Not(Sentence):
+
+    __slots__ = ("operand",)
+
     def __init__(self, operand):
         Sentence.validate(operand)
         self.operand = operand
 
     def __eq__(self, other):
-        return isinstance(other, Not) and self.operand == other.operand
+        return self is other or (
+            isinstance(other, Not) and self.operand == other.operand
+        )
 
-    def __hash__(self):
-        return hash(("not", hash(self.operand)))
+    __hash__ = Sentence.__hash__
+
+    def operands(self):
+        return (self.operand,)
 
     def __repr__(self):
         return f"Not({self.operand})"
@@ -86,27 +198,38 @@ class Not(Sentence):
     def evaluate(self, model):
         return not self.operand.evaluate(model)
 
+    def bits(self, patterns, mask):
+        return mask ^ self.operand.bits(patterns, mask)
+
     def formula(self):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
-    def symbols(self):
-        return self.operand.symbols()
-
 
 class And(Sentence):
+
+    __slots__ = ("conjuncts",)
+
+    @classmethod
+    def intern_key(cls, *conjuncts):
+        # Not shared until it is frozen (see Interned.share), since add
+        # changes it
+        return None
+
     def __init__(self, *conjuncts):
         for conjunct in conjuncts:
             Sentence.validate(conjunct)
         self.conjuncts = list(conjuncts)
 
     def __eq__(self, other):
-        return isinstance(other, And) and self.conjuncts == other.conjuncts
-
-    def __hash__(self):
-        return hash(
-            ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
+        return self is other or (
+            isinstance(other, And) and self.conjuncts == other.conjuncts
         )
 
+    __hash__ = Sentence.__hash__
+
+    def operands(self):
+        return tuple(self.conjuncts)
+
     def __repr__(self):
         conjunctions = ", ".join(
             [str(conjunct) for conjunct in self.conjuncts]
@@ -115,35 +238,50 @@ class And(Sentence):
 
     def add(self, conjunct):
         Sentence.validate(conjunct)
-        self.conjuncts.append(conjunct)
+        if self._key is not None:
+            raise ValueError("cannot add to a conjunction that is an "
+                             "operand of another sentence")
+        self.conjuncts.append(Interned.share(conjunct))
+        self._hash = None
+        self._symbols = None
 
     def evaluate(self, model):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
 
+    def bits(self, patterns, mask):
+        value = mask
+        for conjunct in self.conjuncts:
+            value &= conjunct.bits(patterns, mask)
+            if not value:
+                break
+        return value
+
     def formula(self):
         if len(self.conjuncts) == 1:
             return self.conjuncts[0].formula()
         return " ∧ ".join([Sentence.parenthesize(conjunct.formula())
                            for conjunct in self.conjuncts])
 
-    def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
-
 
 class Or(Sentence):
+
+    __slots__ = ("disjuncts",)
+
     def __init__(self, *disjuncts):
         for disjunct in disjuncts:
             Sentence.validate(disjunct)
         self.disjuncts = list(disjuncts)
 
     def __eq__(self, other):
-        return isinstance(other, Or) and self.disjuncts == other.disjuncts
-
-    def __hash__(self):
-        return hash(
-            ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
+        return self is other or (
+            isinstance(other, Or) and self.disjuncts == other.disjuncts
         )
 
+    __hash__ = Sentence.__hash__
+
+    def operands(self):
+        return tuple(self.disjuncts)
+
     def __repr__(self):
         disjuncts = ", ".join([str(disjunct) for disjunct in self.disjuncts])
         return f"Or({disjuncts})"
@@ -151,17 +289,25 @@ class Or(Sentence):
     def evaluate(self, model):
         return any(disjunct.evaluate(model) for disjunct in self.disjuncts)
 
+    def bits(self, patterns, mask):
+        value = 0
+        for disjunct in self.disjuncts:
+            value |= disjunct.bits(patterns, mask)
+            if value == mask:
+                break
+        return value
+
     def formula(self):
         if len(self.disjuncts) == 1:
             return self.disjuncts[0].formula()
         return " ∨  ".join([Sentence.parenthesize(disjunct.formula())
                             for disjunct in self.disjuncts])
 
-    def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
-
 
 class Implication(Sentence):
+
+    __slots__ = ("antecedent", "consequent")
+
     def __init__(self, antecedent, consequent):
         Sentence.validate(antecedent)
         Sentence.validate(consequent)
@@ -169,12 +315,14 @@ class Implication(Sentence):
         self.consequent = consequent
 
     def __eq__(self, other):
-        return (isinstance(other, Implication)
-                and self.antecedent == other.antecedent
-                and self.consequent == other.consequent)
+        return self is other or (isinstance(other, Implication)
+                                 and self.antecedent == other.antecedent
+                                 and self.consequent == other.consequent)
 
-    def __hash__(self):
-        return hash(("implies", hash(self.antecedent), hash(self.consequent)))
+    __hash__ = Sentence.__hash__
+
+    def operands(self):
+        return (self.antecedent, self.consequent)
 
     def __repr__(self):
         return f"Implication({self.antecedent}, {self.consequent})"
@@ -183,16 +331,20 @@ class Implication(Sentence):
         return ((not self.antecedent.evaluate(model))
                 or self.consequent.evaluate(model))
 
+    def bits(self, patterns, mask):
+        return ((mask ^ self.antecedent.bits(patterns, mask))
+                | self.consequent.bits(patterns, mask))
+
     def formula(self):
         antecedent = Sentence.parenthesize(self.antecedent.formula())
         consequent = Sentence.parenthesize(self.consequent.formula())
         return f"{antecedent} => {consequent}"
 
-    def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
-
 
 class Biconditional(Sentence):
+
+    __slots__ = ("left", "right")
+
     def __init__(self, left, right):
         Sentence.validate(left)
         Sentence.validate(right)
@@ -200,12 +352,14 @@ class Biconditional(Sentence):
         self.right = right
 
     def __eq__(self, other):
-        return (isinstance(other, Biconditional)
-                and self.left == other.left
-                and self.right == other.right)
+        return self is other or (isinstance(other, Biconditional)
+                                 and self.left == other.left
+                                 and self.right == other.right)
 
-    def __hash__(self):
-        return hash(("biconditional", hash(self.left), hash(self.right)))
+    __hash__ = Sentence.__hash__
+
+    def operands(self):
+        return (self.left, self.right)
 
     def __repr__(self):
         return f"Biconditional({self.left}, {self.right})"
@@ -216,17 +370,42 @@ class Biconditional(Sentence):
                 or (not self.left.evaluate(model)
                     and not self.right.evaluate(model)))
 
+    def bits(self, patterns, mask):
+        return mask ^ (self.left.bits(patterns, mask)
+                       ^ self.right.bits(patterns, mask))
+
     def formula(self):
-        left = Sentence.parenthesize(str(self.left))
-        right = Sentence.parenthesize(str(self.right))
+        left = Sentence.parenthesize(self.left.formula())
+        right = Sentence.parenthesize(self.right.formula())
         return f"{left} <=> {right}"
 
-    def symbols(self):
-        return set.union(self.left.symbols(), self.right.symbols())
 
+def model_check(knowledge, query, method=None):
+    """Checks if knowledge base entails query.
+
+    method is "bitset" (evaluate every model), "sat" (check that
+    knowledge ∧ ¬query is unsatisfiable) or None to pick the faster one
+    for the number of symbols: the truth table up to BITSET_LIMIT (18)
+    symbols, the SAT solver above. Only an explicit "bitset" with 28 or
+    more symbols (bitset.PARALLEL_BLOCKS blocks) on a machine with more
+    than one core checks the truth table in a pool of processes.
+    """
+    if method is None:
+        # Get all symbols in both knowledge and query
+        symbols = set.union(knowledge.symbols(), query.symbols())
+        method = "bitset" if len(symbols) <= BITSET_LIMIT else "sat"
+
+    if method == "bitset":
+        import bitset
+        return bitset.entails(knowledge, query)
+    if method == "sat":
+        import sat
+        return sat.entails(knowledge, query)
+    raise ValueError(f"unknown method {method!r}")
 
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
+
+def enumeration_check(knowledge, query):
+    """Checks if knowledge base entails query, one model at a time."""
 
     def check_all(knowledge, query, symbols, model):
         """Checks if knowledge base entails query, given a particular model."""
@@ -261,3 +440,71 @@ def model_check(knowledge, query):
 
     # Check that knowledge entails query
     return check_all(knowledge, query, symbols, dict())
+
+
+class KnowledgeBase():
+    """A changing set of sentences that answers many queries.
+
+    The models of all sentences are enumerated once (as bitsets, see
+    bitset.py) and every query is checked against only those; answers
+    are remembered until the knowledge base changes. Telling a sentence
+    over known symbols narrows the stored models instead of starting
+    over. With more than BITSET_LIMIT symbols, or a query about symbols
+    the knowledge base does not mention, ask falls back to model_check.
+    """
+
+    def __init__(self, *sentences):
+        self.sentences = []
+        self.answers = {}
+        # Symbols of the enumerated models, and the models by block
+        self.names = None
+        self.models = None
+        for sentence in sentences:
+            self.tell(sentence)
+
+    def __len__(self):
+        return len(self.sentences)
+
+    def __repr__(self):
+        sentences = ", ".join([str(sentence) for sentence in self.sentences])
+        return f"KnowledgeBase({sentences})"
+
+    def knowledge(self):
+        """Returns the conjunction of all sentences."""
+        return And(*self.sentences)
+
+    def tell(self, sentence):
+        """Adds a sentence to the knowledge base."""
+        import bitset
+        Sentence.validate(sentence)
+        self.sentences.append(sentence)
+        self.answers.clear()
+        if self.models is not None:
+            if sentence.symbols() <= set(self.names):
+                self.models = bitset.restrict(self.models, sentence, self.names)
+            else:
+                self.models = None
+
+    def retract(self, sentence):
+        """Removes a sentence told before; raises ValueError if there is none."""
+        self.sentences.remove(sentence)
+        self.answers.clear()
+        self.models = None
+
+    def ask(self, query):
+        """Checks if the knowledge base entails query."""
+        Sentence.validate(query)
+        if query not in self.answers:
+            self.answers[query] = self.entails(query)
+        return self.answers[query]
+
+    def entails(self, query):
+        import bitset
+        knowledge = self.knowledge()
+        symbols = knowledge.symbols()
+        if len(symbols) > BITSET_LIMIT or not query.symbols() <= symbols:
+            return model_check(knowledge, query)
+        if self.models is None:
+            self.names = sorted(symbols)
+            self.models = bitset.satisfying_models(knowledge, self.names)
+        return bitset.true_in_all(self.models, query, self.names)
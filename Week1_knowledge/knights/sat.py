@@ -0,0 +1,271 @@
+"""
+SAT backend for logic.model_check.
+
+Enumerating all 2^n models stops being feasible somewhere above 20
+symbols. Instead, knowledge entails query exactly when
+knowledge ∧ ¬query has no model at all, which a SAT solver can usually
+decide without looking at more than a tiny part of the truth table:
+
+- The sentences are converted to conjunctive normal form (a list of
+  clauses, each an "or" of literals) with the Tseitin transform: every
+  And/Or/Implication/Biconditional gets a new variable that is defined to
+  be equal to it. Unlike distributing "or" over "and", this keeps the
+  number of clauses linear in the size of the sentence.
+- The clauses are solved with DPLL: assign a variable, propagate the
+  clauses that have one literal left (unit propagation), and backtrack
+  on a conflict. Unit propagation uses two watched literals per clause,
+  so only clauses watching a literal that just became false are visited.
+
+Variables are numbered from 1; literal v means variable v is true, -v
+that it is false.
+"""
+from logic import Symbol, Not, And, Or, Implication, Biconditional
+
+
+class Encoder():
+    """
+    Converts sentences to clauses with the Tseitin transform.
+    """
+
+    def __init__(self):
+        # Variable of every symbol name
+        self.variables = {}
+        self.num_variables = 0
+        self.clauses = []
+        # Literal of every sentence converted so far, by id
+        self.literals = {}
+        self.sentences = []
+
+    def new_variable(self):
+        self.num_variables += 1
+        return self.num_variables
+
+    def variable(self, name):
+        """
+        Returns the variable of the symbol called name.
+        """
+        if name not in self.variables:
+            self.variables[name] = self.new_variable()
+        return self.variables[name]
+
+    def add(self, sentence):
+        """
+        Adds clauses requiring sentence to be true.
+        """
+        self.clauses.append([self.literal(sentence)])
+
+    def literal(self, sentence):
+        """
+        Returns a literal that is true exactly when sentence is true,
+        adding the clauses that define it.
+        """
+        key = id(sentence)
+        if key in self.literals:
+            return self.literals[key]
+
+        if isinstance(sentence, Symbol):
+            literal = self.variable(sentence.name)
+        elif isinstance(sentence, Not):
+            literal = -self.literal(sentence.operand)
+        elif isinstance(sentence, And):
+            literal = self.gate_and(
+                [self.literal(conjunct) for conjunct in sentence.conjuncts]
+            )
+        elif isinstance(sentence, Or):
+            literal = -self.gate_and(
+                [-self.literal(disjunct) for disjunct in sentence.disjuncts]
+            )
+        elif isinstance(sentence, Implication):
+            literal = -self.gate_and([self.literal(sentence.antecedent),
+                                      -self.literal(sentence.consequent)])
+        elif isinstance(sentence, Biconditional):
+            literal = self.gate_iff(self.literal(sentence.left),
+                                    self.literal(sentence.right))
+        else:
+            raise TypeError(f"cannot convert {type(sentence).__name__}")
+
+        # Keep the sentence alive, so its id is not reused
+        self.literals[key] = literal
+        self.sentences.append(sentence)
+        return literal
+
+    def gate_and(self, literals):
+        """
+        Returns a new variable g with g <=> (l1 ∧ l2 ∧ ...).
+        """
+        g = self.new_variable()
+        for literal in literals:
+            self.clauses.append([-g, literal])
+        self.clauses.append([g] + [-literal for literal in literals])
+        return g
+
+    def gate_iff(self, a, b):
+        """
+        Returns a new variable g with g <=> (a <=> b).
+        """
+        g = self.new_variable()
+        self.clauses.append([-g, -a, b])
+        self.clauses.append([-g, a, -b])
+        self.clauses.append([g, a, b])
+        self.clauses.append([g, -a, -b])
+        return g
+
+
+class Solver():
+    """
+    DPLL solver with unit propagation on two watched literals.
+    """
+
+    def __init__(self, num_variables, clauses):
+        self.num_variables = num_variables
+        # value[v] is True, False or None (unassigned)
+        self.value = [None] * (num_variables + 1)
+        self.trail = []
+        self.propagated = 0
+        self.watches = {}
+        self.clauses = []
+        self.conflict = False
+
+        counts = [0] * (num_variables + 1)
+        for clause in clauses:
+            self.add_clause(clause)
+            for literal in clause:
+                counts[abs(literal)] += 1
+
+        # Branch on the variables that occur most often first
+        self.order = sorted(range(1, num_variables + 1),
+                            key=lambda v: counts[v], reverse=True)
+
+    def literal_value(self, literal):
+        value = self.value[abs(literal)]
+        if value is None or literal > 0:
+            return value
+        return not value
+
+    def add_clause(self, clause):
+        clause = list(dict.fromkeys(clause))
+        literals = set(clause)
+        if any(-literal in literals for literal in clause):
+            # Always true
+            return
+        if not clause:
+            self.conflict = True
+        elif len(clause) == 1:
+            if not self.assign(clause[0]):
+                self.conflict = True
+        else:
+            self.clauses.append(clause)
+            for literal in clause[:2]:
+                self.watches.setdefault(literal, []).append(clause)
+
+    def assign(self, literal):
+        """
+        Makes literal true; returns False if it already is false.
+        """
+        value = self.literal_value(literal)
+        if value is not None:
+            return value
+        self.value[abs(literal)] = literal > 0
+        self.trail.append(literal)
+        return True
+
+    def propagate(self):
+        """
+        Assigns the literals implied by unit clauses until there are none
+        left; returns False on a conflict.
+        """
+        while self.propagated < len(self.trail):
+            false = -self.trail[self.propagated]
+            self.propagated += 1
+            watching = self.watches.get(false, [])
+            kept = []
+            for index, clause in enumerate(watching):
+                # Keep the false literal in position 1
+                if clause[0] == false:
+                    clause[0], clause[1] = clause[1], clause[0]
+                if self.literal_value(clause[0]) is True:
+                    kept.append(clause)
+                    continue
+
+                # Look for another literal to watch
+                for k in range(2, len(clause)):
+                    if self.literal_value(clause[k]) is not False:
+                        clause[1], clause[k] = clause[k], clause[1]
+                        self.watches.setdefault(clause[1], []).append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if not self.assign(clause[0]):
+                        kept.extend(watching[index + 1:])
+                        self.watches[false] = kept
+                        return False
+            self.watches[false] = kept
+        return True
+
+    def undo(self, length):
+        """
+        Unassigns everything after the first length literals of the trail.
+        """
+        while len(self.trail) > length:
+            self.value[abs(self.trail.pop())] = None
+        self.propagated = min(self.propagated, length)
+
+    def solve(self):
+        """
+        Returns True if the clauses are satisfiable, False otherwise.
+        """
+        if self.conflict:
+            return False
+
+        # Each decision: (trail length before it, literal, both tried)
+        decisions = []
+        while True:
+            if not self.propagate():
+                while decisions:
+                    length, literal, flipped = decisions.pop()
+                    self.undo(length)
+                    if not flipped:
+                        decisions.append((length, -literal, True))
+                        self.assign(-literal)
+                        break
+                else:
+                    return False
+                continue
+
+            variable = next(
+                (v for v in self.order if self.value[v] is None), None
+            )
+            if variable is None:
+                return True
+            decisions.append((len(self.trail), variable, False))
+            self.assign(variable)
+
+    def model(self, variables):
+        """
+        Returns the truth value of every symbol, after solve returned True.
+        """
+        return {name: bool(self.value[v]) for name, v in variables.items()}
+
+
+def satisfiable(sentence):
+    """
+    Returns a model (symbol name: truth value) in which sentence is true,
+    or None if there is none.
+    """
+    encoder = Encoder()
+    encoder.add(sentence)
+    solver = Solver(encoder.num_variables, encoder.clauses)
+    if not solver.solve():
+        return None
+    return solver.model(encoder.variables)
+
+
+def entails(knowledge, query):
+    """
+    Returns True if knowledge entails query, i.e. if there is no model of
+    knowledge in which query is false.
+    """
+    encoder = Encoder()
+    encoder.add(knowledge)
+    encoder.add(Not(query))
+    return not Solver(encoder.num_variables, encoder.clauses).solve()
@@ -0,0 +1,115 @@
+"""
+Batch solver for knights and knaves puzzles.
+
+Answering a puzzle means asking, for every symbol, whether the knowledge
+base entails it. Rather than running model_check once per symbol, solve
+asks a logic.KnowledgeBase, which enumerates the models of the knowledge
+base once (as bitsets, see bitset.py) and checks every symbol against
+those. Many puzzles are solved in parallel by a pool of processes, and
+every result records how long its puzzle took.
+
+Usage: python solver.py [FILE] [--processes N]
+
+Without FILE, solves the puzzles of puzzle.py. FILE holds one puzzle
+per line as a formula (see formulas.parse), or, if it ends in .kb, is a
+file written by formulas.dump with one sentence per puzzle; their
+symbols are all queried.
+"""
+import argparse
+import multiprocessing
+import os
+import time
+
+import formulas
+from logic import KnowledgeBase, Symbol
+
+
+def solve(knowledge, symbols):
+    """
+    Returns the names of the symbols that knowledge entails.
+    """
+    kb = KnowledgeBase(knowledge)
+    return [symbol.name for symbol in symbols if kb.ask(symbol)]
+
+
+def solve_puzzle(job):
+    """
+    Solves one (name, knowledge, symbols) puzzle; returns its name, the
+    entailed symbols and the time taken in seconds.
+    """
+    name, knowledge, symbols = job
+    start = time.perf_counter()
+    entailed = solve(knowledge, symbols)
+    return {
+        "puzzle": name,
+        "entailed": entailed,
+        "seconds": time.perf_counter() - start
+    }
+
+
+def solve_all(puzzles, processes=None):
+    """
+    Solves a list of (name, knowledge, symbols) puzzles in a pool of
+    processes (one per core by default); returns the results in order.
+    """
+    if processes == 1 or len(puzzles) < 2:
+        return [solve_puzzle(puzzle) for puzzle in puzzles]
+    chunksize = max(1, len(puzzles) // (4 * (processes or os.cpu_count())))
+    with multiprocessing.Pool(processes) as pool:
+        return pool.map(solve_puzzle, puzzles, chunksize=chunksize)
+
+
+def puzzles_from_file(path):
+    """
+    Returns the puzzles in the file at path, querying all their symbols.
+    """
+    if path.endswith(".kb"):
+        sentences = formulas.load(path)
+    else:
+        with open(path, encoding="utf-8") as f:
+            sentences = [formulas.parse(line) for line in f if line.strip()]
+    return [
+        (f"Puzzle {i}", knowledge,
+         [Symbol(name) for name in sorted(knowledge.symbols())])
+        for i, knowledge in enumerate(sentences)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Solve knights and knaves puzzles."
+    )
+    parser.add_argument("file", nargs="?",
+                        help="puzzles, one formula per line or a .kb file "
+                             "(default: the puzzles of puzzle.py)")
+    parser.add_argument("--processes", type=int, default=None,
+                        help="number of worker processes (default: one "
+                             "per core)")
+    args = parser.parse_args()
+
+    if args.file:
+        puzzles = puzzles_from_file(args.file)
+    else:
+        import puzzle
+        symbols = [puzzle.AKnight, puzzle.AKnave, puzzle.BKnight,
+                   puzzle.BKnave, puzzle.CKnight, puzzle.CKnave]
+        puzzles = [
+            ("Puzzle 0", puzzle.knowledge0, symbols),
+            ("Puzzle 1", puzzle.knowledge1, symbols),
+            ("Puzzle 2", puzzle.knowledge2, symbols),
+            ("Puzzle 3", puzzle.knowledge3, symbols)
+        ]
+
+    start = time.perf_counter()
+    results = solve_all(puzzles, args.processes)
+    seconds = time.perf_counter() - start
+
+    for result in results:
+        print(f"{result['puzzle']} ({1000 * result['seconds']:.2f} ms)")
+        for name in result["entailed"]:
+            print(f"    {name}")
+    print(f"Solved {len(results)} puzzles in {seconds:.3f}s")
+
+
+if __name__ == "__main__":
+    main()